@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# YouTube Music Playlist Downloader
+# Benchmarks
+
+import os
+import sys
+import time
+import argparse
+import contextlib
+import tempfile
+import statistics
+import tracemalloc
+import subprocess
+import multiprocessing
+import concurrent.futures
+from mutagen import id3
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Also needed by benchmark worker processes which import this file
+sys.path.insert(0, root_dir)
+
+def time_python_code(code, runs):
+    # Run in a fresh interpreter each time to measure cold start
+    timings = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=root_dir, text=True)
+        timings.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+def benchmark_startup(args):
+    module_import = "\n".join([
+        "import time",
+        "start = time.perf_counter()",
+        "import youtube_music_playlist_downloader",
+        "print(time.perf_counter() - start)"
+    ])
+    heavy_import = "\n".join([
+        "import time",
+        "start = time.perf_counter()",
+        "import youtube_music_playlist_downloader",
+        "import yt_dlp, requests, langcodes, PIL.Image",
+        "print(time.perf_counter() - start)"
+    ])
+    ffmpeg_check = "\n".join([
+        "import time",
+        "import youtube_music_playlist_downloader as downloader",
+        "start = time.perf_counter()",
+        "downloader.check_ffmpeg()",
+        "print(time.perf_counter() - start)"
+    ])
+
+    print(f"Startup benchmark (median of {args.runs} runs)")
+    print(f"- Module import (lazy): {time_python_code(module_import, args.runs) * 1000:.1f} ms")
+    print(f"- Module import with heavy modules: {time_python_code(heavy_import, args.runs) * 1000:.1f} ms")
+    print(f"- ffmpeg check (cached probe): {time_python_code(ffmpeg_check, args.runs) * 1000:.1f} ms")
+
+def create_song_files(directory, count, cover_size=200 * 1024, lyrics_lines=200):
+    for i in range(count):
+        video_id = f"video{i:06d}"[:11]
+        file_path = os.path.join(directory, f"{i + 1}. Song {i}-{video_id}.mp3")
+        with open(file_path, "wb") as f:
+            f.write(b"\xff\xfb\x90\x64" + b"\x00" * 4096)
+
+        tags = id3.ID3()
+        tags.add(id3.APIC(3, "image/jpeg", 3, "Front cover", os.urandom(cover_size)))
+        tags.add(id3.TIT2(encoding=3, text=f"Song {i}"))
+        tags.add(id3.TRCK(encoding=3, text=str(i + 1)))
+        tags.add(id3.SYLT(encoding=3, lang="eng", format=2, type=1, text=[(f"Line {line}", line * 1000) for line in range(lyrics_lines)]))
+        tags.add(id3.USLT(encoding=3, lang="eng", text="\n".join(f"Line {line}" for line in range(lyrics_lines))))
+        tags.add(id3.WOAR(f"https://www.youtube.com/watch?v={video_id}"))
+        tags.save(file_path, v2_version=3)
+
+def benchmark_scan(args):
+    import youtube_music_playlist_downloader as downloader
+
+    with tempfile.TemporaryDirectory() as directory:
+        create_song_files(directory, args.songs)
+
+        start = time.perf_counter()
+        for file_name in os.listdir(directory):
+            downloader.read_song_file_info_from_tags(file_name, os.path.join(directory, file_name))
+        full_tags_time = time.perf_counter() - start
+
+        downloader.song_file_info_cache.clear()
+        start = time.perf_counter()
+        downloader.get_song_file_infos(directory)
+        header_scan_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        downloader.get_song_file_infos(directory)
+        cached_scan_time = time.perf_counter() - start
+
+    print(f"Folder scan benchmark ({args.songs} songs)")
+    print(f"- Full tag parsing: {full_tags_time * 1000:.1f} ms")
+    print(f"- Header-only parallel scan: {header_scan_time * 1000:.1f} ms")
+    print(f"- Repeated scan of unchanged files: {cached_scan_time * 1000:.1f} ms")
+
+def update_song_file(file_path, cover_file):
+    # Same work as a forced metadata update, with the cover and lyrics overridden so no network is used
+    import youtube_music_playlist_downloader as downloader
+
+    config = downloader.setup_config({})
+    config["metadata_overrides"] = {
+        "cover": cover_file,
+        "lyrics": [[f"Line {line}", line * 1000] for line in range(200)]
+    }
+    video_id = downloader.get_video_id_from_file_name(file_path)
+    info_dict = {"id": video_id, "title": "Song", "uploader": "Uploader", "upload_date": "20240101"}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        downloader.generate_metadata(file_path, f"https://www.youtube.com/watch?v={video_id}", 1, "Playlist", config, False, True, info_dict)
+
+def benchmark_update(args):
+    from PIL import Image
+
+    workers = os.cpu_count() or 1
+    print(f"Metadata update benchmark ({args.songs} songs, {workers} workers)")
+    with tempfile.TemporaryDirectory() as directory:
+        cover_file = os.path.join(directory, "cover.png")
+        Image.effect_noise((1280, 720), 64).convert("RGB").save(cover_file)
+
+        executors = [
+            ("Threads", lambda: concurrent.futures.ThreadPoolExecutor(max_workers=workers)),
+            ("Processes", lambda: concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")))
+        ]
+        for name, create_executor in executors:
+            songs_directory = os.path.join(directory, name)
+            os.mkdir(songs_directory)
+            create_song_files(songs_directory, args.songs)
+            file_paths = [os.path.join(songs_directory, file_name) for file_name in os.listdir(songs_directory)]
+
+            start = time.perf_counter()
+            with create_executor() as executor:
+                list(executor.map(update_song_file, file_paths, [cover_file] * len(file_paths)))
+            print(f"- {name}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+def create_flat_entry(i):
+    # Similar to the playlist entries returned by yt-dlp with extract_flat
+    video_id = f"video{i:06d}"[:11]
+    return {
+        "_type": "url",
+        "ie_key": "Youtube",
+        "id": video_id,
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+        "title": f"Song {i}",
+        "description": None,
+        "duration": 200 + i % 100,
+        "channel_id": f"UC{i:022d}",
+        "channel": f"Artist {i % 500}",
+        "channel_url": f"https://www.youtube.com/channel/UC{i:022d}",
+        "uploader": f"Artist {i % 500}",
+        "uploader_id": f"@artist{i % 500}",
+        "uploader_url": f"https://www.youtube.com/@artist{i % 500}",
+        "thumbnails": [{"url": f"https://i.ytimg.com/vi/{video_id}/{name}.jpg", "height": height, "width": width} for name, width, height in [("default", 120, 90), ("mqdefault", 320, 180), ("hqdefault", 480, 360), ("sddefault", 640, 480)]],
+        "timestamp": None,
+        "release_timestamp": None,
+        "availability": None,
+        "view_count": 1000 * i,
+        "live_status": None,
+        "channel_is_verified": None,
+        "__x_forwarded_for_ip": None
+    }
+
+def measure_memory(create):
+    # Memory still allocated by the created objects once temporary allocations are freed
+    tracemalloc.start()
+    value = create()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return size
+
+def benchmark_memory(args):
+    import youtube_music_playlist_downloader as downloader
+
+    count = 10000
+    print(f"Memory benchmark ({count} playlist entries and songs)")
+    full_entries_size = measure_memory(lambda: [create_flat_entry(i) for i in range(count)])
+    compact_entries_size = measure_memory(lambda: [downloader.get_playlist_entry(create_flat_entry(i)) for i in range(count)])
+    song_file_infos_size = measure_memory(lambda: {f"video{i:06d}"[:11]: downloader.SongFileInfo(f"video{i:06d}"[:11], f"Song {i}", f"{i + 1}. Song {i}.mp3", os.path.join("Playlist", f"{i + 1}. Song {i}.mp3"), i + 1) for i in range(count)})
+    print(f"- Playlist entries from yt-dlp: {full_entries_size / 1024:.0f} KB")
+    print(f"- Compact playlist entries: {compact_entries_size / 1024:.0f} KB")
+    print(f"- Song file infos: {song_file_infos_size / 1024:.0f} KB")
+
+benchmarks = {
+    "startup": benchmark_startup,
+    "scan": benchmark_scan,
+    "update": benchmark_update,
+    "memory": benchmark_memory
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run benchmarks for the playlist downloader")
+    parser.add_argument("benchmark", choices=list(benchmarks.keys()) + ["all"], nargs="?", default="all")
+    parser.add_argument("--runs", type=int, default=5, help="Number of runs to take the median of")
+    parser.add_argument("--songs", type=int, default=500, help="Number of synthetic songs to use")
+    args = parser.parse_args()
+
+    for name, benchmark in benchmarks.items():
+        if args.benchmark in (name, "all"):
+            benchmark(args)
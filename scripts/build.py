@@ -28,6 +28,10 @@ opts = ['-F', 'youtube_music_playlist_downloader.py']
 opts = [
     '--upx-exclude=vcruntime140.dll',
     '--noconfirm',
+    # Modules imported lazily by the program are not detected automatically
+    '--hidden-import=PIL.Image',
+    '--hidden-import=requests',
+    '--hidden-import=langcodes',
     '--additional-hooks-dir=scripts/yt-dlp-master/yt_dlp/__pyinstaller',
     *opts,
     'scripts/yt-dlp-master/yt_dlp/__main__.py',
@@ -1,61 +1,84 @@
 #!/usr/bin/env python3
 # YouTube Music Playlist Downloader
-# Download a single song
+# Download single songs
 
 import os
-from yt_dlp import YoutubeDL, postprocessor
-from urllib.parse import urlparse, parse_qs
-from mutagen.id3 import ID3, WOAR, error
+import sys
+import argparse
+import concurrent.futures
+from urllib.parse import urlparse
 
-class FilePathCollector(postprocessor.common.PostProcessor):
-    def __init__(self):
-        super(FilePathCollector, self).__init__(None)
-        self.file_paths = []
-
-    def run(self, information):
-        self.file_paths.append(information['filepath'])
-        return [], information
-
-def generate_metadata(file_path, link):
-    tags = ID3(file_path)
-    tags.add(WOAR(link))
-    tags.save(v2_version=3)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import youtube_music_playlist_downloader as downloader
 
 def get_url_path(url):
     return urlparse(url).path.rpartition('/')[2]
 
-def get_url_parameter(url, param):
-    return parse_qs(urlparse(url).query)[param][0]
-
-def download_video(link):
-    directory = os.getcwd()
-
-    ytdl_opts = {
-        "outtmpl": f"{directory}/%(id)s.%(ext)s",
-        "ignoreerrors": True,
-        "format": "bestaudio/best",
-        "postprocessors": [{
-            "key": "FFmpegExtractAudio",
-            "preferredcodec": "mp3",
-            "preferredquality": "5",
-        }],
-        "geo_bypass": True,
-        "quiet": True,
-        "external_downloader_args": ["-loglevel", "panic"]
-    }
-
-    with YoutubeDL(ytdl_opts) as ytdl:
-        file_path_collector = FilePathCollector()
-        ytdl.add_post_processor(file_path_collector)
-        result = ytdl.download([link])
-        file_path = file_path_collector.file_paths[0]
-    return result, file_path
-
-url = input("Link: ")
-if "youtu.be" in url:
-    video_id = get_url_path(url)
-else:
-    video_id = get_url_parameter(url, "v")
-link = f"https://www.youtube.com/watch?v={video_id}"
-result, file_path = download_video(link)
-generate_metadata(file_path, link)
+def get_video_id(url):
+    if "youtu.be" in url:
+        return get_url_path(url)
+    return downloader.get_url_parameter(url, "v")
+
+def get_single_song_config():
+    # Songs are named by video id and are not part of an album or track list
+    config = downloader.setup_config({})
+    config["name_format"] = "%(id)s.%(ext)s"
+    config["track_num_in_name"] = False
+    config["use_playlist_name"] = False
+    config["include_metadata"]["track"] = False
+    return downloader.get_override_config(None, config)
+
+def read_links(links_file):
+    if links_file is None:
+        return [input("Link: ")]
+    if links_file == "-":
+        return sys.stdin.read().splitlines()
+    with open(links_file, "r") as f:
+        return f.read().splitlines()
+
+def download_links(links, directory, workers: int):
+    config = get_single_song_config()
+
+    # Skip songs that are already downloaded in the target folder
+    existing_video_ids = set(downloader.get_song_file_infos(directory).keys())
+    video_ids = []
+    for url in links:
+        url = url.strip()
+        if url == "" or url.startswith("#"):
+            continue
+        try:
+            video_id = get_video_id(url)
+        except Exception:
+            print(f"Skipping invalid link '{url}'")
+            continue
+        if video_id in existing_video_ids:
+            print(f"Skipped downloading '{url}', already downloaded")
+            continue
+        existing_video_ids.add(video_id)
+        video_ids.append(video_id)
+
+    failed_count = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        tasks = []
+        for video_id in video_ids:
+            link = f"https://www.youtube.com/watch?v={video_id}"
+            print(f"Downloading '{link}'...")
+            video_info = downloader.PlaylistEntry(video_id, "", "")
+            tasks.append(executor.submit(downloader.download_song_and_update, video_info, "", link, directory, 0, config))
+
+        for task in concurrent.futures.as_completed(tasks):
+            error_message, _, _ = task.result()
+            if error_message is not None:
+                print(error_message)
+                failed_count += 1
+
+    print(f"Downloaded {len(video_ids) - failed_count} of {len(video_ids)} song(s).")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download single songs into a folder")
+    parser.add_argument("links_file", nargs="?", help="File with one link per line, or '-' to read links from stdin (default: prompt for a single link)")
+    parser.add_argument("--directory", default=".", help="Folder to download songs into (default: current directory)")
+    parser.add_argument("--workers", type=int, default=4, help="Number of songs to download at once (default: 4)")
+    args = parser.parse_args()
+
+    download_links(read_links(args.links_file), args.directory, args.workers)
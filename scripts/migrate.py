@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# YouTube Music Playlist Downloader
+# Song metadata migrations
+
+import os
+import sys
+import json
+import argparse
+import threading
+import concurrent.futures
+from mutagen import id3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import youtube_music_playlist_downloader as downloader
+
+config_file_name = ".playlist_config.json"
+progress_file_name = ".migration_progress.json"
+
+# Migrations are applied in order of version to the tags of each song file
+# Each migration returns whether the tags were changed
+migrations = []
+
+def migration(version: int, description: str):
+    def register(migrate):
+        migrations.append((version, description, migrate))
+        migrations.sort(key=lambda entry: entry[0])
+        return migrate
+    return register
+
+@migration(1, "Add link metadata (WOAR) to songs downloaded before 1.2.0")
+def add_link_metadata(tags, file_name):
+    if tags.getall("WOAR"):
+        return False
+
+    video_id = downloader.get_video_id_from_file_name(file_name)
+    if video_id is None:
+        raise Exception("No video id found in file name")
+    tags.add(id3.WOAR(f"https://www.youtube.com/watch?v={video_id}"))
+    return True
+
+def load_progress(playlist_path, target_version: int):
+    # Progress is only resumed if it was recorded for the same target version
+    try:
+        with open(os.path.join(playlist_path, progress_file_name), "r") as f:
+            progress = json.load(f)
+        if progress["schema_version"] == target_version:
+            return set(progress["completed"])
+    except Exception:
+        pass
+    return set()
+
+def save_progress(playlist_path, target_version: int, completed: set):
+    downloader.write_config(os.path.join(playlist_path, progress_file_name), {
+        "schema_version": target_version,
+        "completed": sorted(completed)
+    })
+
+def migrate_song(playlist_path, file_name, pending_migrations, dry_run: bool):
+    file_path = os.path.join(playlist_path, file_name)
+    try:
+        tags = id3.ID3(file_path)
+    except Exception:
+        # File is not considered a song file if it contains no metadata
+        return []
+
+    applied = []
+    for version, description, migrate in pending_migrations:
+        if migrate(tags, file_name):
+            applied.append(version)
+
+    if applied and not dry_run:
+        downloader.save_tags(tags, file_path)
+    return applied
+
+def migrate_playlist(playlist_path, workers: int, dry_run: bool):
+    config_file = os.path.join(playlist_path, config_file_name)
+    with open(config_file, "r") as f:
+        config = json.load(f)
+
+    current_version = config.get("schema_version", 0)
+    pending_migrations = [entry for entry in migrations if entry[0] > current_version]
+    if not pending_migrations:
+        # Folders that are already migrated are never rescanned
+        return
+
+    target_version = pending_migrations[-1][0]
+    completed = set() if dry_run else load_progress(playlist_path, target_version)
+    file_names = [entry.name for entry in os.scandir(playlist_path) if entry.is_file() and not entry.name.startswith(".") and entry.name not in completed]
+    print(f"Migrating '{playlist_path}' from schema version {current_version} to {target_version} ({len(file_names)} files{', resuming' if completed else ''})...")
+
+    completed_lock = threading.Lock()
+    changed_count = 0
+    failed_count = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        tasks = {executor.submit(migrate_song, playlist_path, file_name, pending_migrations, dry_run): file_name for file_name in file_names}
+        for task in concurrent.futures.as_completed(tasks):
+            file_name = tasks[task]
+            try:
+                applied = task.result()
+            except Exception as e:
+                print(f"Unable to migrate '{file_name}': {e}")
+                failed_count += 1
+                continue
+
+            if applied:
+                changed_count += 1
+                versions = ", ".join(str(version) for version in applied)
+                print(f"{'Would apply' if dry_run else 'Applied'} migration(s) {versions} to '{file_name}'")
+
+            if not dry_run:
+                with completed_lock:
+                    completed.add(file_name)
+                    if len(completed) % 100 == 0:
+                        save_progress(playlist_path, target_version, completed)
+
+    if dry_run:
+        print(f"{changed_count} file(s) would be changed in '{playlist_path}'.")
+        return
+
+    if failed_count > 0:
+        # Keep progress so only the failed files are retried
+        save_progress(playlist_path, target_version, completed)
+        print(f"{failed_count} file(s) could not be migrated in '{playlist_path}'. Please fix them and run the migration again.")
+        return
+
+    config["schema_version"] = target_version
+    downloader.write_config(config_file, config)
+    progress_file = os.path.join(playlist_path, progress_file_name)
+    if os.path.exists(progress_file):
+        os.remove(progress_file)
+    print(f"Migrated {changed_count} file(s) in '{playlist_path}'.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate song metadata in playlist folders to the latest schema version")
+    parser.add_argument("directory", nargs="?", default=".", help="A playlist folder or a folder of playlist folders (default: current directory)")
+    parser.add_argument("--workers", type=int, default=min(32, (os.cpu_count() or 1) + 4), help="Number of files to migrate in parallel")
+    parser.add_argument("--dry-run", action="store_true", help="Only show the changes that would be made")
+    args = parser.parse_args()
+
+    if migrations[-1][0] != downloader.schema_version:
+        raise Exception(f"Latest migration version {migrations[-1][0]} does not match schema version {downloader.schema_version}")
+
+    if os.path.exists(os.path.join(args.directory, config_file_name)):
+        playlist_paths = [args.directory]
+    else:
+        playlist_paths = [os.path.join(args.directory, playlist_data["playlist_name"]) for playlist_data in downloader.get_existing_playlists(args.directory, config_file_name)]
+
+    for playlist_path in playlist_paths:
+        try:
+            migrate_playlist(playlist_path, args.workers, args.dry_run)
+        except Exception as e:
+            print(f"Unable to migrate '{playlist_path}': {e}")
@@ -0,0 +1,45 @@
+import copy
+import json
+
+import youtube_music_playlist_downloader as downloader
+
+def round_trip(config):
+    return json.loads(json.dumps(downloader.setup_config(copy.deepcopy(config))))
+
+def test_explicit_override_is_kept():
+    config = {"audio_codec": "mp3", "overrides": {"aaaaaaaaaaa": {"audio_codec": "mp3", "include_metadata": {"album": True}}}}
+    saved = round_trip(round_trip(config))
+    assert saved["overrides"]["aaaaaaaaaaa"] == {"audio_codec": "mp3", "include_metadata": {"album": True}}
+
+    # Explicit values stay pinned when the playlist config changes
+    saved["audio_codec"] = "opus"
+    saved["include_metadata"]["album"] = False
+    song_config = downloader.get_override_config("aaaaaaaaaaa", downloader.setup_config(saved))
+    assert song_config["audio_codec"] == "mp3"
+    assert song_config["include_metadata"]["album"] is True
+
+def test_unset_values_follow_playlist_config():
+    saved = round_trip({"overrides": {"aaaaaaaaaaa": {"cover_size": 600}}})
+    saved["audio_codec"] = "opus"
+    song_config = downloader.get_override_config("aaaaaaaaaaa", downloader.setup_config(saved))
+    assert song_config["audio_codec"] == "opus"
+    assert song_config["cover_size"] == 600
+
+def test_full_copy_override_is_trimmed():
+    base_config = downloader.setup_config({})
+    full_copy = copy.deepcopy(base_config["overrides"]["EXAMPLE_VIDEO_ID_HERE"])
+    full_copy["cover_size"] = 600
+    full_copy["metadata_overrides"]["title"] = "Other title"
+
+    saved = round_trip({"overrides": {"aaaaaaaaaaa": full_copy}})
+    assert saved["overrides"]["aaaaaaaaaaa"] == {"cover_size": 600, "metadata_overrides": {"title": "Other title"}}
+    assert round_trip(saved)["overrides"] == saved["overrides"]
+
+def test_override_resolves_like_full_config():
+    config = {"name_format": "%(title)s.%(ext)s", "overrides": {"aaaaaaaaaaa": {"audio_codec": "opus", "metadata_overrides": {"artist": "Artist"}}}}
+    saved = round_trip(config)
+    song_config = downloader.get_override_config("aaaaaaaaaaa", downloader.setup_config(saved))
+    expected = downloader.get_override_config("bbbbbbbbbbb", downloader.setup_config(saved))
+    expected["audio_codec"] = "opus"
+    expected["metadata_overrides"]["artist"] = "Artist"
+    assert song_config == expected
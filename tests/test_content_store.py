@@ -0,0 +1,86 @@
+import os
+import shutil
+
+import pytest
+from mutagen import id3
+
+import youtube_music_playlist_downloader as downloader
+
+VIDEO_ID = "dQw4w9WgXcQ"
+
+@pytest.fixture
+def config(tmp_path):
+    return downloader.setup_config({"content_store": str(tmp_path / "store")})
+
+def write_song(path, tagged=True):
+    with open(path, "wb") as f:
+        f.write(b"\xff\xfb\x90\x64" + b"\x00" * 1024)
+    if tagged:
+        tags = id3.ID3()
+        tags.add(id3.TIT2(encoding=3, text="Title"))
+        tags.add(id3.WOAR(url=f"https://www.youtube.com/watch?v={VIDEO_ID}"))
+        tags.save(path, v2_version=3)
+
+def fake_reflink(src_path, dst_path):
+    shutil.copyfile(src_path, dst_path)
+    return True
+
+def test_link_file_prefers_hard_link(tmp_path):
+    write_song(tmp_path / "a.mp3")
+    downloader.link_file(str(tmp_path / "a.mp3"), str(tmp_path / "b.mp3"))
+    assert os.stat(tmp_path / "b.mp3").st_nlink == 2
+    assert sorted(os.listdir(tmp_path)) == ["a.mp3", "b.mp3"]
+
+def test_link_file_falls_back_to_clone(tmp_path, monkeypatch):
+    def no_link(src_path, dst_path):
+        raise OSError("Hard links are not supported")
+    monkeypatch.setattr(downloader.os, "link", no_link)
+    write_song(tmp_path / "a.mp3")
+    downloader.link_file(str(tmp_path / "a.mp3"), str(tmp_path / "b.mp3"))
+    assert os.stat(tmp_path / "b.mp3").st_nlink == 1
+    assert (tmp_path / "b.mp3").read_bytes() == (tmp_path / "a.mp3").read_bytes()
+
+def test_clone_file_falls_back_to_copy(tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, "reflink_file", lambda src_path, dst_path: False)
+    write_song(tmp_path / "a.mp3")
+    downloader.clone_file(str(tmp_path / "a.mp3"), str(tmp_path / "b.mp3"))
+    assert (tmp_path / "b.mp3").read_bytes() == (tmp_path / "a.mp3").read_bytes()
+
+def test_unshare_file_breaks_hard_links(tmp_path):
+    write_song(tmp_path / "a.mp3")
+    os.link(tmp_path / "a.mp3", tmp_path / "b.mp3")
+    downloader.unshare_file(str(tmp_path / "b.mp3"))
+    assert os.stat(tmp_path / "a.mp3").st_nlink == 1
+    assert os.stat(tmp_path / "b.mp3").st_nlink == 1
+
+def test_reflinked_songs_are_stored(tmp_path, config, monkeypatch):
+    monkeypatch.setattr(downloader, "reflink_file", fake_reflink)
+    (tmp_path / "A").mkdir()
+    write_song(tmp_path / "A" / "song.ogg", tagged=False)
+    downloader.store_song(str(tmp_path / "A" / "song.ogg"), VIDEO_ID, str(tmp_path / "A"), config)
+
+    # Found by its extension even though the audio codec is 'mp3'
+    stored_file_path = downloader.find_stored_song(VIDEO_ID, config)
+    assert stored_file_path == os.path.join(config["content_store"], f"{downloader.get_content_store_key(VIDEO_ID, config)}.ogg")
+    assert downloader.find_song_source(VIDEO_ID, config) is None
+
+def test_songs_are_copied_from_other_playlists_without_reflinks(tmp_path, config, monkeypatch):
+    monkeypatch.setattr(downloader, "reflink_file", lambda src_path, dst_path: False)
+    (tmp_path / "A").mkdir()
+    (tmp_path / "B").mkdir()
+    write_song(tmp_path / "A" / "1. Title.mp3", tagged=False)
+    downloader.store_song(str(tmp_path / "A" / "1. Title.mp3"), VIDEO_ID, str(tmp_path / "A"), config)
+    assert downloader.find_stored_song(VIDEO_ID, config) is None
+
+    # Tagged and renamed in its playlist after it was recorded
+    write_song(tmp_path / "A" / "1. Title.mp3")
+    os.rename(tmp_path / "A" / "1. Title.mp3", tmp_path / "A" / "2. Title.mp3")
+    source_file_path = downloader.find_song_source(VIDEO_ID, config)
+    assert os.path.samefile(source_file_path, tmp_path / "A" / "2. Title.mp3")
+
+    monkeypatch.setattr(downloader, "get_song_info_ytdl", lambda track_num, config: type("Ytdl", (), {"prepare_filename": lambda self, info_dict: f"{track_num}. {info_dict['title']}.{info_dict['ext']}"})())
+    file_path = downloader.restore_stored_song(source_file_path, {"title": "Title"}, str(tmp_path / "B"), 1, config, True)
+    assert os.stat(file_path).st_nlink == 1
+    with pytest.raises(id3.ID3NoHeaderError):
+        id3.ID3(file_path)
+    assert sorted(os.listdir(tmp_path / "B")) == ["1. Title.mp3"]
@@ -0,0 +1,45 @@
+from io import BytesIO
+
+import pytest
+import requests
+from PIL import Image
+
+import youtube_music_playlist_downloader as downloader
+
+THUMBNAILS = {"small": (640, 480), "large": (1280, 720), "default": (480, 360)}
+
+def get_response(url, status_code):
+    response = requests.models.Response()
+    response.url = url
+    response.status_code = status_code
+    if status_code == 200:
+        with BytesIO() as f:
+            Image.new("RGB", THUMBNAILS[url]).save(f, format="jpeg")
+            response._content = f.getvalue()
+    else:
+        response._content = b"<html>Error</html>"
+    return response
+
+@pytest.fixture
+def info_dict():
+    return {
+        "thumbnail": "default",
+        "thumbnails": [{"url": url, "width": width, "height": height} for url, (width, height) in THUMBNAILS.items()]
+    }
+
+@pytest.mark.parametrize("status_code", [404, 403, 500])
+def test_failed_thumbnails_fall_back_to_the_next(monkeypatch, info_dict, status_code):
+    requested_urls = []
+    def http_get(url, **kwargs):
+        requested_urls.append(url)
+        return get_response(url, status_code if url == "small" else 200)
+    monkeypatch.setattr(downloader, "http_get", http_get)
+
+    image = downloader.download_cover_thumbnail(info_dict, downloader.setup_config({"cover_size": 300}))
+    assert requested_urls == ["small", "large"]
+    assert image.size == THUMBNAILS["large"]
+
+def test_failed_default_thumbnail_raises(monkeypatch, info_dict):
+    monkeypatch.setattr(downloader, "http_get", lambda url, **kwargs: get_response(url, 503))
+    with pytest.raises(requests.HTTPError):
+        downloader.download_cover_thumbnail(info_dict, downloader.setup_config({"cover_size": 300}))
@@ -0,0 +1,64 @@
+import sys
+import time
+
+import pytest
+import yt_dlp
+
+import youtube_music_playlist_downloader as downloader
+
+def download_error(error):
+    # yt-dlp reports extractor errors as a DownloadError holding the original error
+    try:
+        raise error
+    except Exception:
+        return yt_dlp.utils.DownloadError(str(error), sys.exc_info())
+
+@pytest.mark.parametrize("error, kind", [
+    (downloader.VideoUnavailableError("Video is unavailable - [Private video]"), "permanent"),
+    (download_error(yt_dlp.utils.GeoRestrictedError("The uploader has not made this video available in your country")), "permanent"),
+    (download_error(yt_dlp.utils.UnsupportedError("https://example.com")), "permanent"),
+    (download_error(yt_dlp.utils.ExtractorError("Unable to download API page", cause=yt_dlp.networking.exceptions.TransportError("Name or service not known"))), "transient"),
+    (download_error(yt_dlp.utils.ExtractorError("Sign in to confirm you're not a bot", expected=True)), "transient"),
+    # Messages alone do not make a failure permanent
+    (Exception("This video contains content from a copyright holder"), "transient"),
+])
+def test_classify_failure(error, kind):
+    assert downloader.classify_failure(error) == kind
+
+def test_classify_failure_follows_wrapped_errors():
+    try:
+        try:
+            raise download_error(yt_dlp.utils.GeoRestrictedError("Blocked"))
+        except Exception as extraction_error:
+            raise Exception(f"Unable to get video info - {extraction_error}") from extraction_error
+    except Exception as e:
+        assert downloader.classify_failure(e) == "permanent"
+
+def test_attempts_are_counted_once_per_sync():
+    failures = {}
+    previous_failures = dict(failures)
+    for _ in range(3):
+        # Retried in the same sync
+        downloader.record_failure(failures, previous_failures, "aaaaaaaaaaa", "Unable to download", "permanent")
+    assert failures["aaaaaaaaaaa"]["attempts"] == 1
+    assert failures["aaaaaaaaaaa"]["next_retry"] == pytest.approx(time.time() + downloader.permanent_failure_backoff, abs=5)
+
+    # Next sync doubles the backoff
+    previous_failures = dict(failures)
+    downloader.record_failure(failures, previous_failures, "aaaaaaaaaaa", "Unable to download", "permanent")
+    assert failures["aaaaaaaaaaa"]["attempts"] == 2
+    assert failures["aaaaaaaaaaa"]["next_retry"] == pytest.approx(time.time() + downloader.permanent_failure_backoff * 2, abs=5)
+
+def test_transient_failures_are_not_skipped():
+    failures = {}
+    downloader.record_failure(failures, {}, "aaaaaaaaaaa", "Unable to download", "transient")
+    assert downloader.get_skipped_failure(failures, "aaaaaaaaaaa") is None
+    downloader.record_failure(failures, {}, "aaaaaaaaaaa", "Unable to download", "permanent")
+    assert downloader.get_skipped_failure(failures, "aaaaaaaaaaa") is not None
+
+def test_failures_of_removed_songs_are_forgotten(tmp_path):
+    failures = {}
+    downloader.record_failure(failures, {}, "aaaaaaaaaaa", "Unable to download", "permanent")
+    downloader.record_failure(failures, {}, "bbbbbbbbbbb", "Unable to download", "permanent")
+    downloader.save_failures(str(tmp_path), failures, {"bbbbbbbbbbb"})
+    assert list(downloader.load_failures(str(tmp_path))) == ["bbbbbbbbbbb"]
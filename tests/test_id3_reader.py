@@ -0,0 +1,72 @@
+import pytest
+from mutagen import id3
+
+import youtube_music_playlist_downloader as downloader
+
+def write_song(path, v2_version, encoding, titles, video_id="dQw4w9WgXcQ", track_num="3"):
+    with open(path, "wb") as f:
+        f.write(b"\xff\xfb\x90\x64" + b"\x00" * 1024)
+    tags = id3.ID3()
+    tags.add(id3.TIT2(encoding=encoding, text=titles))
+    tags.add(id3.TRCK(encoding=encoding, text=track_num))
+    tags.add(id3.APIC(encoding=0, mime="image/jpeg", type=3, data=b"\x00" * 4096))
+    tags.add(id3.WOAR(url=f"https://www.youtube.com/watch?v={video_id}"))
+    tags.save(path, v2_version=v2_version)
+
+@pytest.mark.parametrize("v2_version", [3, 4])
+@pytest.mark.parametrize("encoding", [0, 1, 2, 3])
+@pytest.mark.parametrize("titles", [["Title"], ["First", "Second", "Third"], ["", "After empty"]])
+def test_frames_match_mutagen(tmp_path, v2_version, encoding, titles):
+    if v2_version == 3 and encoding in (2, 3):
+        pytest.skip("ID3v2.3 has no UTF-16BE or UTF-8 text")
+    file_path = tmp_path / "song.mp3"
+    write_song(file_path, v2_version, encoding, titles)
+
+    tags = id3.ID3(file_path)
+    frames = downloader.read_id3_frames(file_path, ["WOAR", "TIT2", "TRCK"])
+    assert frames["TIT2"] == [str(tags["TIT2"])]
+    assert frames["TRCK"] == [str(tags["TRCK"])]
+    assert frames["WOAR"] == [tags.getall("WOAR")[0].url]
+
+def test_non_latin_titles_match_mutagen(tmp_path):
+    file_path = tmp_path / "song.mp3"
+    write_song(file_path, 4, 1, ["日本語", "Ünïcödé"])
+    frames = downloader.read_id3_frames(file_path, ["TIT2"])
+    assert frames["TIT2"] == [str(id3.ID3(file_path)["TIT2"])]
+
+def test_file_without_tag(tmp_path):
+    file_path = tmp_path / "song.mp3"
+    file_path.write_bytes(b"\xff\xfb\x90\x64" + b"\x00" * 1024)
+    assert downloader.read_id3_frames(file_path, ["TIT2"]) is None
+
+@pytest.mark.parametrize("data", [b"", b"\x05Title"])
+def test_invalid_text_frames_raise_value_error(data):
+    with pytest.raises(ValueError):
+        downloader.decode_id3_frame("TIT2", data)
+
+def test_song_file_info_matches_mutagen(tmp_path):
+    write_song(tmp_path / "3. Title-dQw4w9WgXcQ.mp3", 4, 1, ["Title"])
+    song_file_info = downloader.read_song_file_info("3. Title-dQw4w9WgXcQ.mp3", str(tmp_path / "3. Title-dQw4w9WgXcQ.mp3"))
+    tags_song_file_info = downloader.read_song_file_info_from_tags("3. Title-dQw4w9WgXcQ.mp3", str(tmp_path / "3. Title-dQw4w9WgXcQ.mp3"))
+    assert (song_file_info.video_id, song_file_info.name, song_file_info.track_num) == ("dQw4w9WgXcQ", "Title", 3)
+    assert (song_file_info.video_id, song_file_info.name, song_file_info.track_num) == (tags_song_file_info.video_id, tags_song_file_info.name, tags_song_file_info.track_num)
+
+def test_trusted_file_name_id_is_checked_against_woar(tmp_path):
+    # The file name says one video but the tag links to another
+    write_song(tmp_path / "3. Title-aaaaaaaaaaa.mp3", 3, 1, ["Title"], video_id="bbbbbbbbbbb")
+    song_file_info = downloader.read_song_file_info("3. Title-aaaaaaaaaaa.mp3", str(tmp_path / "3. Title-aaaaaaaaaaa.mp3"), True)
+    assert song_file_info.video_id == "bbbbbbbbbbb"
+
+def test_trusted_file_name_without_woar_is_ignored(tmp_path):
+    file_path = tmp_path / "3. Title-aaaaaaaaaaa.mp3"
+    write_song(file_path, 3, 1, ["Title"])
+    tags = id3.ID3(file_path)
+    tags.delall("WOAR")
+    tags.save(file_path, v2_version=3)
+    assert downloader.read_song_file_info(file_path.name, str(file_path), True) is None
+
+def test_trust_file_name_ids_needs_id_at_end_of_name_format():
+    config = downloader.setup_config({"trust_file_name_ids": True})
+    assert downloader.get_trust_file_name_ids(config)
+    config["name_format"] = "%(id)s-%(title)s.%(ext)s"
+    assert not downloader.get_trust_file_name_ids(config)
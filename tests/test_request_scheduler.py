@@ -0,0 +1,76 @@
+import threading
+import time
+
+import youtube_music_playlist_downloader as downloader
+
+def run_requests(scheduler, count, on_start=None):
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def request():
+        with scheduler.slot("media"):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            if on_start is not None:
+                on_start()
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=request) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, peak
+
+def test_concurrency_limit():
+    scheduler = downloader.RequestScheduler()
+    scheduler.configure({"media": 2}, {})
+    threads, peak = run_requests(scheduler, 6)
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+
+def test_limit_holds_across_reconfigure():
+    scheduler = downloader.RequestScheduler()
+    scheduler.configure({"media": 2}, {})
+    started = threading.Event()
+    threads, peak = run_requests(scheduler, 6, started.set)
+    started.wait()
+    # Swapping the limit mid-run must not let requests in flight be forgotten
+    scheduler.configure({"media": 3}, {})
+    scheduler.configure({"media": 2}, {})
+    for thread in threads:
+        thread.join()
+    assert peak[0] <= 2
+    assert scheduler.active_requests["media"] == 0
+
+def test_raised_limit_wakes_waiting_requests():
+    scheduler = downloader.RequestScheduler()
+    scheduler.configure({"media": 1}, {})
+    entered = threading.Event()
+
+    def request():
+        with scheduler.slot("media"):
+            entered.set()
+
+    with scheduler.slot("media"):
+        thread = threading.Thread(target=request)
+        thread.start()
+        assert not entered.wait(0.1)
+        scheduler.configure({"media": 2}, {})
+        assert entered.wait(1)
+    thread.join()
+
+def test_early_release():
+    scheduler = downloader.RequestScheduler()
+    scheduler.configure({"media": 1}, {})
+    with scheduler.slot("media") as release:
+        release()
+        release()
+        assert scheduler.active_requests["media"] == 0
+        # Another request can run while the first one is still converting
+        with scheduler.slot("media"):
+            assert scheduler.active_requests["media"] == 1
+    assert scheduler.active_requests["media"] == 0
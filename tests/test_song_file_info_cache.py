@@ -0,0 +1,25 @@
+import youtube_music_playlist_downloader as downloader
+
+from test_id3_reader import write_song
+
+def test_least_recently_used_entries_are_dropped():
+    cache = downloader.SongFileInfoCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache.entries) == 2
+
+def test_changed_files_are_read_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, "song_file_info_cache", downloader.SongFileInfoCache(10))
+    file_name = "1. Title-dQw4w9WgXcQ.mp3"
+    write_song(tmp_path / file_name, 4, 3, ["Title"], track_num="1")
+    song_file_info = downloader.get_song_file_info(str(tmp_path), file_name)
+    assert song_file_info.track_num == 1
+    assert downloader.get_song_file_info(str(tmp_path), file_name) is song_file_info
+
+    write_song(tmp_path / file_name, 4, 3, ["Title"], track_num="12")
+    assert downloader.get_song_file_info(str(tmp_path), file_name).track_num == 12
@@ -0,0 +1,32 @@
+import json
+
+from mutagen import id3
+
+import youtube_music_playlist_downloader as downloader
+
+def write_song(path, video_id, track_num=None):
+    with open(path, "wb") as f:
+        f.write(b"\xff\xfb\x90\x64" + b"\x00" * 1024)
+    tags = id3.ID3()
+    tags.add(id3.TIT2(encoding=3, text=video_id))
+    if track_num is not None:
+        tags.add(id3.TRCK(encoding=3, text=str(track_num)))
+    tags.add(id3.WOAR(url=f"https://www.youtube.com/watch?v={video_id}"))
+    tags.save(path, v2_version=3)
+
+def test_songs_without_unique_track_nums_are_not_indexed(tmp_path):
+    config = downloader.setup_config({})
+    write_song(tmp_path / "1. a.mp3", "aaaaaaaaaaa", 1)
+    write_song(tmp_path / "b.mp3", "bbbbbbbbbbb")
+    write_song(tmp_path / "c.mp3", "ccccccccccc")
+    write_song(tmp_path / "2. d.mp3", "ddddddddddd", 2)
+    write_song(tmp_path / "2. e.mp3", "eeeeeeeeeee", 2)
+    downloader.save_song_index(str(tmp_path), "Playlist", config)
+
+    with open(tmp_path / downloader.song_index_file_name, "r") as f:
+        assert json.load(f)["songs"] == {"1": ["aaaaaaaaaaa", "1. a.mp3"]}
+
+    playlist_title, song_file_info = downloader.find_indexed_song(str(tmp_path), 1, config)
+    assert (playlist_title, song_file_info.video_id) == ("Playlist", "aaaaaaaaaaa")
+    assert downloader.find_indexed_song(str(tmp_path), 0, config) is None
+    assert downloader.find_indexed_song(str(tmp_path), 2, config) is None
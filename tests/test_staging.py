@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+import youtube_music_playlist_downloader as downloader
+
+@pytest.fixture
+def staging(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "PL").mkdir()
+    (tmp_path / "stage").mkdir()
+    monkeypatch.setattr(downloader, "staging_usage", downloader.StagingUsage())
+    download_dirs = []
+
+    def download_song(link, playlist_name, track_num, config, embed_cover):
+        file_path = os.path.join(playlist_name, f"{track_num}. Title-{link[-11:]}.mp3")
+        with open(file_path, "wb") as f:
+            f.write(b"\x00" * 1024 * 1024)
+        download_dirs.append(os.path.abspath(playlist_name))
+        return 0, file_path, {"duration": 60}
+
+    monkeypatch.setattr(downloader, "download_song", download_song)
+    monkeypatch.setattr(downloader, "generate_metadata", lambda file_path, *args: None)
+    config = downloader.setup_config({"staging_dir": str(tmp_path / "stage"), "staging_limit": 2})
+    return config, download_dirs
+
+def download(config, video_id, track_num):
+    video_info = downloader.PlaylistEntry(video_id, "channel", "Title")
+    return downloader.download_song_and_update(video_info, "Playlist", f"https://www.youtube.com/watch?v={video_id}", "PL", track_num, config)
+
+def test_staged_songs_are_published(staging, tmp_path):
+    config, download_dirs = staging
+    assert download(config, "aaaaaaaaaaa", 1) == (None, 1, None)
+    assert download_dirs[0].startswith(str(tmp_path / "stage"))
+    assert os.listdir("PL") == ["1. Title-aaaaaaaaaaa.mp3"]
+    assert downloader.staging_usage.get(config["staging_dir"]) == 0
+
+def test_full_staging_dir_is_skipped(staging, tmp_path):
+    config, download_dirs = staging
+    with open(tmp_path / "stage" / "other", "wb") as f:
+        f.write(b"\x00" * 3 * 1024 * 1024)
+    downloader.clean_staging_dir("PL", config)
+    assert download(config, "aaaaaaaaaaa", 1) == (None, 1, None)
+    assert download_dirs[0] == str(tmp_path / "PL")
@@ -0,0 +1,75 @@
+import concurrent.futures
+import os
+
+import pytest
+from mutagen import id3
+
+import youtube_music_playlist_downloader as downloader
+
+# MPEG-1 Layer III at 128 kbps and 44.1 kHz, 417 bytes and 1152 samples per frame
+frame_header = b"\xff\xfb\x90\x00"
+frame_length = 417
+frame_duration = 1152 / 44100
+
+def make_frame():
+    return frame_header + b"\x55" * (frame_length - 4)
+
+def make_xing_frame(frame_count, byte_count):
+    xing = b"Xing" + (3).to_bytes(4, "big") + frame_count.to_bytes(4, "big") + byte_count.to_bytes(4, "big")
+    return (frame_header + b"\x00" * 32 + xing).ljust(frame_length, b"\x00")
+
+def write_song(path, audio, duration=None, video_id="dQw4w9WgXcQ", id3v1=False):
+    with open(path, "wb") as f:
+        f.write(audio)
+        if id3v1:
+            f.write(b"TAG" + b"\x00" * 125)
+    tags = id3.ID3()
+    tags.add(id3.TIT2(encoding=3, text="Title"))
+    tags.add(id3.TRCK(encoding=3, text="1"))
+    tags.add(id3.WOAR(url=f"https://www.youtube.com/watch?v={video_id}"))
+    if duration is not None:
+        tags.add(id3.TLEN(encoding=3, text=str(int(duration * 1000))))
+    tags.save(path, v2_version=4, padding=lambda info: 512)
+
+def test_intact_song(tmp_path):
+    file_path = tmp_path / "song.mp3"
+    write_song(file_path, make_xing_frame(101, 101 * frame_length) + make_frame() * 100, duration=100 * frame_duration, id3v1=True)
+    assert downloader.verify_song_file(file_path) is None
+
+@pytest.mark.parametrize("audio, error", [
+    (b"\x00" * 64, "No audio frames found"),
+    (make_frame() * 10 + make_frame()[:200], "Truncated audio frame at byte"),
+    (make_frame() * 5 + b"\x12\x34\x56\x78" * 100 + make_frame() * 5, "Invalid audio frame at byte"),
+    (make_xing_frame(101, 101 * frame_length) + make_frame() * 50, f"Truncated audio ({51 * frame_length} of {101 * frame_length} bytes)"),
+    (make_xing_frame(101, 51 * frame_length) + make_frame() * 50, "Missing audio frames (50 of 101)"),
+])
+def test_broken_song(tmp_path, audio, error):
+    file_path = tmp_path / "song.mp3"
+    write_song(file_path, audio)
+    assert downloader.verify_song_file(file_path).startswith(error)
+
+def test_duration_mismatch(tmp_path):
+    file_path = tmp_path / "song.mp3"
+    write_song(file_path, make_frame() * 100, duration=60)
+    assert downloader.verify_song_file(file_path).startswith("Duration of 2.6s does not match the expected 60.0s")
+
+def test_verify_playlist_moves_broken_songs(tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, "song_file_info_cache", downloader.SongFileInfoCache(10))
+    write_song(tmp_path / "1. Good-aaaaaaaaaaa.mp3", make_frame() * 20, video_id="aaaaaaaaaaa")
+    write_song(tmp_path / "2. Broken-bbbbbbbbbbb.mp3", make_frame() * 20 + make_frame()[:100], video_id="bbbbbbbbbbb")
+    verified_files = []
+
+    def verify_song_file(file_path):
+        verified_files.append(os.path.basename(file_path))
+        return downloader_verify_song_file(file_path)
+
+    downloader_verify_song_file = downloader.verify_song_file
+    monkeypatch.setattr(downloader, "verify_song_file", verify_song_file)
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        assert downloader.verify_playlist(str(tmp_path), executor) == ["2. Broken-bbbbbbbbbbb.mp3"]
+        assert os.path.exists(tmp_path / downloader.corrupt_dir_name / "2. Broken-bbbbbbbbbbb.mp3")
+        assert not os.path.exists(tmp_path / "2. Broken-bbbbbbbbbbb.mp3")
+
+        # Unchanged songs are not verified again
+        assert downloader.verify_playlist(str(tmp_path), executor) == []
+    assert sorted(verified_files) == ["1. Good-aaaaaaaaaaa.mp3", "2. Broken-bbbbbbbbbbb.mp3"]
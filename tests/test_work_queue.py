@@ -0,0 +1,99 @@
+import json
+import os
+import time
+
+import pytest
+
+import youtube_music_playlist_downloader as downloader
+
+def make_stale(file_path, age):
+    stale_time = time.time() - age
+    os.utime(file_path, (stale_time, stale_time))
+
+@pytest.fixture
+def playlist(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "PL").mkdir()
+    monkeypatch.setattr(downloader, "request_scheduler", downloader.RequestScheduler())
+    monkeypatch.setattr(downloader, "bandwidth_limiter", downloader.BandwidthLimiter())
+    return downloader.setup_config({"bandwidth_limit": 1000})
+
+def test_claim_and_reclaim(tmp_path):
+    assert downloader.claim_work_task(str(tmp_path), "000000", "worker-a")
+    assert not downloader.claim_work_task(str(tmp_path), "000000", "worker-b")
+
+    # Claims that are no longer kept fresh are taken over by another worker
+    make_stale(tmp_path / "000000", downloader.work_claim_timeout + 1)
+    assert downloader.claim_work_task(str(tmp_path), "000000", "worker-b")
+    assert (tmp_path / "000000").read_text() == "worker-b"
+    assert not downloader.claim_work_task(str(tmp_path), "000000", "worker-a")
+
+def test_claim_heartbeat(tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, "work_claim_timeout", 0.2)
+    for sub_dir in ("tasks", "claims", "results"):
+        (tmp_path / sub_dir).mkdir()
+    downloader.write_work_file(str(tmp_path / "tasks" / "000000.json"), {"function": "update_song", "args": [downloader.encode_work_value(1)]})
+    assert downloader.claim_work_task(str(tmp_path / "claims"), "000000", "worker-a")
+    make_stale(tmp_path / "claims" / "000000", 10)
+
+    def update_song(value):
+        time.sleep(0.3)
+        # The claim is still fresh after running longer than the claim timeout
+        assert not downloader.claim_work_task(str(tmp_path / "claims"), "000000", "worker-b")
+        return value + 1
+
+    monkeypatch.setattr(downloader, "update_song", update_song)
+    downloader.run_work_task(str(tmp_path), "000000")
+    with open(tmp_path / "results" / "000000.json", "r") as f:
+        assert json.load(f) == {"result": {"value": 2}}
+
+def test_worker_runs_stale_claims_and_counts_all_workers(playlist, monkeypatch):
+    work_queue = downloader.WorkQueue("PL", playlist, 0)
+    try:
+        queue_dir = os.path.join("PL", downloader.work_queue_dir_name)
+        bandwidth_shares = []
+
+        def update_song(value):
+            bandwidth_shares.append(downloader.bandwidth_limiter.shares)
+            return value * 2
+
+        monkeypatch.setattr(downloader, "update_song", update_song)
+        futures = [work_queue.submit(update_song, value) for value in range(3)]
+
+        # A task claimed by a worker that stopped is run again
+        assert downloader.claim_work_task(os.path.join(queue_dir, "claims"), "000001", "stopped-worker")
+        make_stale(os.path.join(queue_dir, "claims", "000001"), downloader.work_claim_timeout + 1)
+        # A worker on another machine shares the bandwidth limit, a stopped one does not
+        open(os.path.join(queue_dir, "workers", "remote-worker"), "w").close()
+        open(os.path.join(queue_dir, "workers", "stopped-worker"), "w").close()
+        make_stale(os.path.join(queue_dir, "workers", "stopped-worker"), downloader.work_worker_timeout + 1)
+
+        open(os.path.join(queue_dir, "closed"), "w").close()
+        downloader.run_worker("PL", poll_interval=0.05)
+
+        assert [future.result(timeout=5) for future in futures] == [0, 2, 4]
+        assert bandwidth_shares == [2, 2, 2]
+        # The worker removes its own file once it finishes
+        assert sorted(os.listdir(os.path.join(queue_dir, "workers"))) == ["remote-worker", "stopped-worker"]
+    finally:
+        work_queue.shutdown(wait=False)
+    assert not os.path.exists(os.path.join("PL", downloader.work_queue_dir_name))
+
+def test_coordinator_lock(playlist):
+    work_queue = downloader.WorkQueue("PL", playlist, 0)
+    try:
+        with pytest.raises(Exception, match="in use by another sync"):
+            downloader.WorkQueue("PL", playlist, 0)
+        assert os.path.exists(work_queue.queue_file)
+
+        # A coordinator that stopped updating its lock loses the queue to a new sync
+        time.sleep(1)
+        make_stale(work_queue.lock_file, downloader.work_coordinator_timeout + 1)
+        new_work_queue = downloader.WorkQueue("PL", playlist, 0)
+    finally:
+        work_queue.shutdown(wait=False)
+
+    # The old coordinator leaves the queue of the new one in place
+    assert os.path.exists(new_work_queue.queue_file)
+    new_work_queue.shutdown(wait=False)
+    assert not os.path.exists(os.path.join("PL", downloader.work_queue_dir_name))
@@ -2,23 +2,56 @@
 # YouTube Music Playlist Downloader
 version = "1.4.2"
 
+# Version of the song metadata format, migrations to this version are in scripts/migrate.py
+schema_version = 1
+
 import os
 import re
 import sys
 import copy
 import json
 import time
-import requests
+import queue
+import argparse
+import collections
+import shutil
+import socket
+import hashlib
+import functools
+import importlib
+import contextlib
+import contextvars
+import threading
 import subprocess
+import multiprocessing
 import concurrent.futures
-from PIL import Image
 from io import BytesIO
 from mutagen import id3
 from pathlib import Path
-from langcodes import Language
-from yt_dlp import YoutubeDL, postprocessor, utils
 from urllib.parse import urlparse, parse_qs
 
+class LazyModule:
+    # Defers importing heavy modules until they are first used
+    def __init__(self, module_name):
+        self._module_name = module_name
+        self._module = None
+
+    def __getattr__(self, name):
+        if self._module is None:
+            self._module = importlib.import_module(self._module_name)
+        return getattr(self._module, name)
+
+yt_dlp = LazyModule("yt_dlp")
+requests = LazyModule("requests")
+langcodes = LazyModule("langcodes")
+Image = LazyModule("PIL.Image")
+http_server = LazyModule("http.server")
+asyncio = LazyModule("asyncio")
+fcntl = LazyModule("fcntl")
+
+# Only load extractors for YouTube to reduce yt-dlp startup time
+allowed_extractors = ["youtube(:.*)?"]
+
 # ID3 info:
 # APIC: thumbnail
 # TIT2: title
@@ -30,16 +63,83 @@ from urllib.parse import urlparse, parse_qs
 # SYLT: synced lyrics
 # USLT: unsynced lyrics
 
-class FilePathCollector(postprocessor.common.PostProcessor):
-    def __init__(self):
-        super(FilePathCollector, self).__init__(None)
-        self.file_paths = []
+@functools.lru_cache(maxsize=None)
+def get_file_path_collector_class():
+    # Defined lazily as yt-dlp is only imported when needed
+    class FilePathCollector(yt_dlp.postprocessor.common.PostProcessor):
+        def __init__(self):
+            super(FilePathCollector, self).__init__(None)
+            self.file_paths = []
+
+        def run(self, information):
+            self.file_paths.append(information['filepath'])
+            return [], information
+
+    return FilePathCollector
+
+def create_file_path_collector():
+    return get_file_path_collector_class()()
+
+@functools.lru_cache(maxsize=None)
+def get_single_pass_audio_class():
+    # Defined lazily as yt-dlp is only imported when needed
+    class SinglePassAudioPP(yt_dlp.postprocessor.FFmpegExtractAudioPP):
+        # Trims, encodes and embeds the cover with a single ffmpeg run instead of separate cutting and tagging passes
+        def __init__(self, preferredcodec, preferredquality, start_time: float, end_time: float, cover_file, padding: int):
+            super(SinglePassAudioPP, self).__init__(None, preferredcodec, preferredquality)
+            self.start_time = start_time
+            self.end_time = end_time
+            self.cover_file = cover_file
+            self.padding = padding
+
+        def run_ffmpeg(self, path, out_path, codec, more_opts):
+            input_opts = []
+            if self.start_time > 0:
+                input_opts += ["-ss", str(self.start_time)]
+            if self.end_time != float("inf"):
+                input_opts += ["-to", str(self.end_time)]
+            input_path_opts = [(path, input_opts)]
+
+            opts = ["-map", "0:a", "-acodec", codec or "copy", *more_opts]
+            if self.cover_file is not None:
+                input_path_opts.append((self.cover_file, []))
+                opts += ["-map", "1:v", "-c:v", "copy", "-disposition:v", "attached_pic", "-metadata:s:v", "title=Front cover", "-metadata:s:v", "comment=Cover (front)"]
+            # Reserve room so the remaining tags are later saved in place
+            opts += ["-id3v2_version", "3", "-metadata_header_padding", str(self.padding)]
+
+            try:
+                self.real_run_ffmpeg(input_path_opts, [(out_path, opts)])
+            except yt_dlp.postprocessor.ffmpeg.FFmpegPostProcessorError as err:
+                raise yt_dlp.utils.PostProcessingError(f"audio conversion failed: {err.msg}")
 
-    def run(self, information):
-        self.file_paths.append(information['filepath'])
-        return [], information
+    return SinglePassAudioPP
+
+def use_single_pass_ffmpeg(config: dict):
+    # Only mp3 files get ID3 tags, and the cover can only be embedded by ffmpeg if it can encode mp3
+    if not config["single_pass_ffmpeg"] or config["audio_codec"] != "mp3":
+        return False
+    capabilities = get_ffmpeg_capabilities()
+    return capabilities is not None and "libmp3lame" in capabilities["audio_encoders"]
+
+class PlaylistEntry:
+    # Only the parts of a playlist entry that are used while syncing, its position is the index in the list of entries
+    __slots__ = ("video_id", "channel_id", "title", "duration")
+
+    def __init__(self, video_id, channel_id, title, duration=None):
+        self.video_id = video_id
+        self.channel_id = channel_id
+        self.title = title
+        self.duration = duration
+
+def get_playlist_entry(entry):
+    # The full entries from yt-dlp are not kept as large playlists would hold many unused fields
+    if entry is None:
+        return None
+    return PlaylistEntry(entry["id"], entry.get("channel_id"), entry.get("title"), entry.get("duration"))
 
 class SongFileInfo:
+    __slots__ = ("video_id", "name", "file_name", "file_path", "track_num")
+
     def __init__(self, video_id, name, file_name, file_path, track_num):
         self.video_id = video_id
         self.name = name
@@ -47,16 +147,159 @@ class SongFileInfo:
         self.file_path = file_path
         self.track_num = track_num
 
+class SongResult:
+    def __init__(self, video_id, track_num, status, message=None):
+        # Status is one of 'downloaded', 'skipped', 'updated', 'renamed' or 'failed'
+        self.video_id = video_id
+        self.track_num = track_num
+        self.status = status
+        self.message = message
+
+    def to_dict(self):
+        return {
+            "video_id": self.video_id,
+            "track_num": self.track_num,
+            "status": self.status,
+            "message": self.message
+        }
+
+class SyncReport:
+    def __init__(self, progress_callback=None):
+        self.song_results = {}
+        self.progress_callback = progress_callback
+        self.stats = SyncStats()
+
+    def record(self, video_id, track_num, status, message=None):
+        song_result = SongResult(video_id, track_num, status, message)
+        self.song_results[video_id] = song_result
+        if self.progress_callback is not None:
+            self.progress_callback(song_result)
+
+    def record_reorder(self, video_id, track_num):
+        song_result = self.song_results.get(video_id)
+        if song_result is None or song_result.status == "skipped":
+            self.record(video_id, track_num, "renamed", None if song_result is None else song_result.message)
+        else:
+            song_result.track_num = track_num
+
+    def get_results(self):
+        return sorted(self.song_results.values(), key=lambda song_result: song_result.track_num)
+
+class SyncCancelledError(Exception):
+    pass
+
+class TaskWindow:
+    def __init__(self, max_pending_tasks: int):
+        self.max_pending_tasks = max(1, max_pending_tasks)
+        self.pending_tasks = {}
+
+    def submit(self, executor, on_result, fn, *args):
+        # Wait for tasks to complete before submitting more to bound memory usage
+        while len(self.pending_tasks) >= self.max_pending_tasks:
+            self.wait(concurrent.futures.FIRST_COMPLETED)
+
+        if isinstance(executor, concurrent.futures.ThreadPoolExecutor):
+            # Threads record their stats to the sync that submitted the task
+            task = executor.submit(contextvars.copy_context().run, fn, *args)
+        else:
+            task = executor.submit(fn, *args)
+        self.pending_tasks[task] = on_result
+
+    def wait(self, return_when=concurrent.futures.ALL_COMPLETED):
+        done_tasks, _ = concurrent.futures.wait(self.pending_tasks.keys(), return_when=return_when)
+        for task in done_tasks:
+            on_result = self.pending_tasks.pop(task)
+            on_result(task.result())
+
 def write_config(file, config: dict):
+    # Unchanged files are only touched so their modified time still shows when they were last written
+    content = json.dumps(config, indent=4)
+    try:
+        with open(file, "r") as f:
+            if f.read() == content:
+                os.utime(file)
+                return
+    except (OSError, UnicodeDecodeError):
+        pass
+
     with open(file, "w") as f:
-        json.dump(config, f, indent=4)
+        f.write(content)
+
+def get_cache_dir():
+    if os.name == "nt":
+        base_dir = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    cache_dir = os.path.join(base_dir, "youtube_music_playlist_downloader")
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+ffmpeg_capabilities = None
+
+def probe_ffmpeg(ffmpeg_path):
+    version_output = subprocess.check_output([ffmpeg_path, "-version"], text=True, errors="replace")
+    encoders_output = subprocess.check_output([ffmpeg_path, "-hide_banner", "-encoders"], text=True, errors="replace")
+
+    # Encoder lines are in the form ' A....D libmp3lame   libmp3lame MP3 (MPEG audio layer 3)'
+    audio_encoders = []
+    listing_started = False
+    for line in encoders_output.splitlines():
+        parts = line.split()
+        if not listing_started:
+            listing_started = len(parts) > 0 and parts[0].startswith("---")
+            continue
+        if len(parts) >= 2 and parts[0].startswith("A"):
+            audio_encoders.append(parts[1])
+
+    return {
+        "version": version_output.splitlines()[0] if version_output else "",
+        "audio_encoders": audio_encoders
+    }
+
+def get_ffmpeg_capabilities():
+    # Probe results are cached on disk and only invalidated when the ffmpeg binary changes
+    global ffmpeg_capabilities
+    ffmpeg_path = shutil.which("ffmpeg")
+    if ffmpeg_path is None:
+        return None
 
-def check_ffmpeg():
-    ffmpeg_available = True
     try:
-        subprocess.check_output(['ffmpeg', '-version'])
-    except Exception as e:
-        ffmpeg_available = False
+        ffmpeg_mtime = os.path.getmtime(ffmpeg_path)
+    except OSError:
+        return None
+
+    if ffmpeg_capabilities is not None and ffmpeg_capabilities["path"] == ffmpeg_path and ffmpeg_capabilities["mtime"] == ffmpeg_mtime:
+        return ffmpeg_capabilities
+
+    cache_file = None
+    try:
+        cache_file = os.path.join(get_cache_dir(), "ffmpeg_capabilities.json")
+        with open(cache_file, "r") as f:
+            cached_capabilities = json.load(f)
+        if cached_capabilities["path"] == ffmpeg_path and cached_capabilities["mtime"] == ffmpeg_mtime:
+            ffmpeg_capabilities = cached_capabilities
+            return ffmpeg_capabilities
+    except Exception:
+        pass
+
+    try:
+        capabilities = probe_ffmpeg(ffmpeg_path)
+    except Exception:
+        return None
+    capabilities["path"] = ffmpeg_path
+    capabilities["mtime"] = ffmpeg_mtime
+    ffmpeg_capabilities = capabilities
+
+    if cache_file is not None:
+        try:
+            write_config(cache_file, capabilities)
+        except OSError:
+            pass
+
+    return ffmpeg_capabilities
+
+def check_ffmpeg():
+    ffmpeg_available = get_ffmpeg_capabilities() is not None
     if not ffmpeg_available:
         print("\n".join([
             "[ERROR] ffmpeg not found. Please ensure ffmpeg is installed",
@@ -66,8 +309,387 @@ def check_ffmpeg():
         ]))
     return ffmpeg_available
 
-def get_playlist_info(config: dict):
-    ytdl_opts = {
+throughput_stats_defaults = {"downloads": 0, "download_seconds": 0.0, "bytes": 0, "audio_seconds": 0.0, "metadata_updates": 0, "metadata_seconds": 0.0, "cover_bytes": 0, "cover_bytes_saved": 0, "transfer_bytes": 0, "throttle_seconds": 0.0}
+
+class SyncStats:
+    # Counters of a single sync so syncs running at the same time do not count each other's work
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tag_saves = {"in_place": 0, "rewrite": 0}
+        self.throughput = dict(throughput_stats_defaults)
+
+    def add(self, tag_saves: dict, throughput: dict):
+        with self.lock:
+            for key, value in tag_saves.items():
+                self.tag_saves[key] += value
+            for key, value in throughput.items():
+                self.throughput[key] += value
+
+    def get(self):
+        with self.lock:
+            return dict(self.tag_saves), dict(self.throughput)
+
+# Stats of the sync the current thread is working on, if any
+current_sync_stats = contextvars.ContextVar("current_sync_stats", default=None)
+
+def record_throughput(**values):
+    stats = current_sync_stats.get()
+    if stats is not None:
+        stats.add({}, values)
+
+def record_tag_save(stat_key):
+    stats = current_sync_stats.get()
+    if stats is not None:
+        stats.add({stat_key: 1}, {})
+
+def load_throughput_history():
+    try:
+        with open(os.path.join(get_cache_dir(), "throughput_history.json"), "r") as f:
+            history = json.load(f)
+        return {key: history.get(key, 0) for key in throughput_stats_defaults.keys()}
+    except Exception:
+        return dict(throughput_stats_defaults)
+
+def save_throughput_history(run_stats: dict):
+    # Adds the throughput of this run to the history used for plan estimates
+    if run_stats["downloads"] == 0 and run_stats["metadata_updates"] == 0:
+        return
+
+    history = load_throughput_history()
+    if history["downloads"] + history["metadata_updates"] > 1000:
+        # Halve older runs so estimates follow recent network conditions
+        history = {key: value / 2 for key, value in history.items()}
+    for key, value in run_stats.items():
+        history[key] += value
+    try:
+        write_config(os.path.join(get_cache_dir(), "throughput_history.json"), history)
+    except OSError:
+        pass
+
+def get_request_kind(url):
+    # Classify network requests by host so each kind of request gets its own budget
+    host = urlparse(url).hostname or ""
+    if host.endswith("googlevideo.com"):
+        return "media"
+    if host.endswith("ytimg.com") or host.endswith("ggpht.com") or host.endswith("googleusercontent.com"):
+        return "cover"
+    if urlparse(url).path.endswith("/timedtext"):
+        return "lyrics"
+    return "metadata"
+
+class RequestScheduler:
+    def __init__(self):
+        # Requests in flight are counted rather than held in semaphores so limits can change while requests are running
+        self.condition = threading.Condition()
+        self.limits = {}
+        self.active_requests = {}
+        self.next_request_times = {}
+
+    def configure(self, concurrency_limits: dict, rate_limits: dict):
+        # Limits of 0 are unlimited, rate limits are in requests per minute
+        with self.condition:
+            for kind in set(concurrency_limits.keys()) | set(rate_limits.keys()):
+                self.limits[kind] = (concurrency_limits.get(kind, 0), rate_limits.get(kind, 0))
+            # Waiting requests may fit within the new limits
+            self.condition.notify_all()
+
+    def wait_for_rate_limit(self, kind):
+        with self.condition:
+            rate_limit = self.limits.get(kind, (0, 0))[1]
+            if rate_limit <= 0:
+                return
+            now = time.monotonic()
+            request_time = max(now, self.next_request_times.get(kind, now))
+            self.next_request_times[kind] = request_time + 60 / rate_limit
+        if request_time > now:
+            time.sleep(request_time - now)
+
+    @contextlib.contextmanager
+    def slot(self, kind):
+        # Yields a function that releases the slot early, such as once a download has finished but is still being converted
+        with self.condition:
+            while 0 < self.limits.get(kind, (0, 0))[0] <= self.active_requests.get(kind, 0):
+                self.condition.wait()
+            self.active_requests[kind] = self.active_requests.get(kind, 0) + 1
+
+        released = False
+        def release():
+            nonlocal released
+            with self.condition:
+                if released:
+                    return
+                released = True
+                self.active_requests[kind] -= 1
+                self.condition.notify_all()
+
+        try:
+            self.wait_for_rate_limit(kind)
+            yield release
+        finally:
+            release()
+
+# Shared by all playlist syncs in this process
+request_scheduler = RequestScheduler()
+
+def parse_clock_time(time_str):
+    # Minutes since midnight of a time of day such as '18:30'
+    hours, minutes = time_str.strip().split(":")
+    return int(hours) * 60 + int(minutes)
+
+class BandwidthLimiter:
+    # Token bucket shared by media downloads and cover and lyrics requests
+    # Transfers go into debt when the bucket is empty and wait until it is paid off
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.limit = 0
+        self.schedule = []
+        self.shares = 1
+        # Token count and last refill time, in shared memory once shared with update processes
+        self.state = [0.0, time.monotonic()]
+
+    def configure(self, limit: float, schedule: list, shares: int=1):
+        # Limits are in KB/s and 0 is unlimited, the first schedule entry covering the time of day overrides the limit
+        # Processes that cannot share the bucket each get an equal share of the limit
+        with self.lock:
+            self.limit = limit
+            self.schedule = schedule
+            self.shares = max(1, shares)
+
+    def share_state(self):
+        # Returns the bucket in shared memory to pass to update processes
+        with self.lock:
+            if not isinstance(self.state, list):
+                return self.state
+            self.state = multiprocessing.get_context("spawn").Array("d", self.state)
+            return self.state
+
+    def use_state(self, state):
+        with self.lock:
+            self.state = state
+
+    def get_limit(self):
+        # Bytes per second allowed at the current time of day
+        with self.lock:
+            limit = self.limit
+            schedule = self.schedule
+        local_time = time.localtime()
+        minutes = local_time.tm_hour * 60 + local_time.tm_min
+        for window in schedule:
+            try:
+                start = parse_clock_time(window["start"])
+                end = parse_clock_time(window["end"])
+            except Exception:
+                continue
+            # Windows may wrap around midnight
+            if (start <= minutes < end) if start <= end else (minutes >= start or minutes < end):
+                limit = window["limit"]
+                break
+        return limit * 1024 / self.shares
+
+    def is_limited(self):
+        with self.lock:
+            return self.limit > 0 or len(self.schedule) > 0
+
+    def consume(self, size: int):
+        limit = self.get_limit()
+        delay = 0.0
+        if limit > 0:
+            state = self.state
+            with self.lock, (state.get_lock() if not isinstance(state, list) else contextlib.nullcontext()):
+                now = time.monotonic()
+                # At most one second of unused bandwidth is saved up for bursts
+                tokens = min(limit, state[0] + (now - state[1]) * limit) - size
+                state[0] = tokens
+                state[1] = now
+                if tokens < 0:
+                    delay = -tokens / limit
+        if delay > 0:
+            time.sleep(delay)
+        record_throughput(transfer_bytes=size, throttle_seconds=delay)
+
+bandwidth_limiter = BandwidthLimiter()
+
+class SyncLimits:
+    # Request and bandwidth limits are shared by all syncs in this process
+    # They are only changed while no sync is running, so syncs running at the same time must use the same limits
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active_syncs = 0
+        self.limits = None
+
+    @contextlib.contextmanager
+    def apply(self, config: dict):
+        limits = (config["request_limits"], config["request_rate_limits"], config["bandwidth_limit"], config["bandwidth_schedule"])
+        with self.lock:
+            if self.active_syncs > 0 and limits != self.limits:
+                raise Exception("Playlists synced at the same time must have the same request_limits, request_rate_limits, bandwidth_limit and bandwidth_schedule")
+            if self.active_syncs == 0:
+                request_scheduler.configure(config["request_limits"], config["request_rate_limits"])
+                bandwidth_limiter.configure(config["bandwidth_limit"], config["bandwidth_schedule"])
+                self.limits = limits
+            self.active_syncs += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.active_syncs -= 1
+
+sync_limits = SyncLimits()
+
+def create_bandwidth_hook():
+    # Progress hook that charges the bytes received since the last update of each download to the bandwidth limit
+    downloaded_bytes = {}
+    def bandwidth_hook(progress: dict):
+        if progress.get("status") != "downloading":
+            return
+        file_name = progress.get("tmpfilename") or progress.get("filename")
+        total_bytes = progress.get("downloaded_bytes") or 0
+        bandwidth_limiter.consume(max(0, total_bytes - downloaded_bytes.get(file_name, 0)))
+        downloaded_bytes[file_name] = total_bytes
+    return bandwidth_hook
+
+http_session = None
+http_session_lock = threading.Lock()
+
+def get_http_session():
+    # Shared between threads so connections are reused for thumbnails and lyrics
+    global http_session
+    with http_session_lock:
+        if http_session is None:
+            http_session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=32)
+            http_session.mount("http://", adapter)
+            http_session.mount("https://", adapter)
+        return http_session
+
+class Cassette:
+    # Records song info, playlist info, HTTP responses and downloaded audio to a folder in record mode
+    # and serves them back without any network access in replay mode
+    # Replayed requests can be slowed down by a fixed latency and a bandwidth limit in bytes per second
+    def __init__(self, directory, mode, latency: float=0.0, bandwidth: float=0.0):
+        self.directory = os.path.abspath(directory)
+        self.mode = mode
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def get_args(self):
+        # Command line arguments to use the same cassette in worker processes
+        args = [f"--{self.mode}", self.directory]
+        if self.mode == "replay":
+            args += ["--latency", str(self.latency), "--bandwidth", str(self.bandwidth / 1024)]
+        return args
+
+    def get_path(self, kind, key):
+        return os.path.join(self.directory, kind, hashlib.sha1(key.encode()).hexdigest())
+
+    def write_file(self, file, data: bytes):
+        Path(file).parent.mkdir(parents=True, exist_ok=True)
+        temp_file = f"{file}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(temp_file, "wb") as f:
+            f.write(data)
+        os.replace(temp_file, file)
+
+    def wait(self, size: int=0):
+        # Simulate network conditions for a replayed request
+        delay = self.latency
+        if self.bandwidth > 0:
+            delay += size / self.bandwidth
+        if delay > 0:
+            time.sleep(delay)
+
+    def record_info(self, key, info_dict: dict):
+        self.write_file(self.get_path("info", key) + ".json", json.dumps(yt_dlp.YoutubeDL.sanitize_info(info_dict)).encode())
+
+    def replay_info(self, key):
+        file = self.get_path("info", key) + ".json"
+        if not os.path.exists(file):
+            raise Exception(f"No recorded info for '{key}'")
+        with open(file, "r") as f:
+            info_dict = json.load(f)
+        self.wait()
+        return info_dict
+
+    def record_response(self, url, response):
+        file = self.get_path("http", url)
+        self.write_file(file, response.content)
+        self.write_file(file + ".json", json.dumps({"url": url, "status_code": response.status_code, "encoding": response.encoding}).encode())
+
+    def replay_response(self, url):
+        file = self.get_path("http", url)
+        if not os.path.exists(file + ".json"):
+            raise Exception(f"No recorded response for '{url}'")
+        with open(file + ".json", "r") as f:
+            response_info = json.load(f)
+        with open(file, "rb") as f:
+            content = f.read()
+
+        response = requests.models.Response()
+        response.url = url
+        response.status_code = response_info["status_code"]
+        response.encoding = response_info["encoding"]
+        response._content = content
+        response.raw = BytesIO(content)
+        self.wait(len(content))
+        return response
+
+    def record_media(self, key, file_path):
+        media_file = self.get_path("media", key) + Path(file_path).suffix
+        Path(media_file).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(file_path, media_file)
+
+    def find_media(self, key):
+        # Returns the recorded audio file for a song or None if it was not recorded
+        media_file = self.get_path("media", key)
+        media_dir = os.path.dirname(media_file)
+        for file_name in os.listdir(media_dir) if os.path.isdir(media_dir) else []:
+            if file_name.startswith(os.path.basename(media_file) + "."):
+                return os.path.join(media_dir, file_name)
+        return None
+
+    def replay_media(self, media_file, file_path):
+        self.wait(os.path.getsize(media_file))
+        shutil.copyfile(media_file, file_path)
+
+# Set to record or replay network traffic
+cassette = None
+
+def http_get(url, **kwargs):
+    with request_scheduler.slot(get_request_kind(url)):
+        if cassette is not None and cassette.mode == "replay":
+            return cassette.replay_response(url)
+
+        response = get_http_session().get(url, timeout=30, **kwargs)
+        if cassette is not None or bandwidth_limiter.is_limited():
+            # The body is read here so it can be recorded and counted and then read again by the caller
+            if cassette is not None:
+                cassette.record_response(url, response)
+            response.raw = BytesIO(response.content)
+            bandwidth_limiter.consume(len(response.content))
+        return response
+
+ytdl_pool = {}
+ytdl_pool_lock = threading.Lock()
+
+@contextlib.contextmanager
+def borrow_ytdl(ytdl_opts: dict):
+    # Reuse idle YoutubeDL instances with identical options to keep extractors and cookies warm
+    key = json.dumps(ytdl_opts, sort_keys=True, default=str)
+    ytdl = None
+    with ytdl_pool_lock:
+        idle_ytdls = ytdl_pool.get(key)
+        if idle_ytdls:
+            ytdl = idle_ytdls.pop()
+    if ytdl is None:
+        ytdl = yt_dlp.YoutubeDL(ytdl_opts)
+
+    try:
+        yield ytdl
+    finally:
+        with ytdl_pool_lock:
+            ytdl_pool.setdefault(key, []).append(ytdl)
+
+def get_playlist_info_ytdl_opts(config: dict):
+    return {
         "quiet": True,
         "geo_bypass": True,
         "dump_single_json": True,
@@ -75,11 +697,39 @@ def get_playlist_info(config: dict):
         "cookiefile": None if config["cookie_file"] == "" else config["cookie_file"],
         "cookiesfrombrowser": None if config["cookies_from_browser"] == "" else tuple(config["cookies_from_browser"].split(":")),
         "extractor_args": config["extractor_args"],
-        "playlistreverse": config["reverse_playlist"]
+        "playlistreverse": config["reverse_playlist"],
+        "allowed_extractors": allowed_extractors
     }
-    with YoutubeDL(ytdl_opts) as ytdl:
+
+def get_playlist_info(config: dict):
+    cassette_key = f"playlist:{config['url']}:{config['reverse_playlist']}"
+    if cassette is not None and cassette.mode == "replay":
+        with request_scheduler.slot("metadata"):
+            return cassette.replay_info(cassette_key)
+
+    with borrow_ytdl(get_playlist_info_ytdl_opts(config)) as ytdl, request_scheduler.slot("metadata"):
         info_dict = ytdl.extract_info(config["url"], download=False)
 
+    if cassette is not None:
+        cassette.record_info(cassette_key, info_dict)
+    return info_dict
+
+def get_playlist_info_stream(config: dict):
+    # Entries are returned as a generator that fetches playlist pages as the entries are consumed
+    # The extractor keeps using this instance while paginating so it is not shared through the pool
+    if cassette is not None:
+        # Recorded playlists are stored whole so they replay the same way
+        return get_playlist_info(config)
+    ytdl = yt_dlp.YoutubeDL(get_playlist_info_ytdl_opts(config))
+    with request_scheduler.slot("metadata"):
+        info_dict = ytdl.extract_info(config["url"], download=False, process=False)
+        # Follow redirects such as YouTube Music links to the playlist page
+        while info_dict.get("_type") in ("url", "url_transparent"):
+            info_dict = ytdl.extract_info(info_dict["url"], download=False, process=False)
+
+    if info_dict.get("entries") is not None:
+        playlist_entries = yt_dlp.utils.PlaylistEntries(ytdl, info_dict)
+        info_dict["entries"] = (entry for _, entry in playlist_entries.get_requested_items())
     return info_dict
 
 def convert_image_type(image, image_type):
@@ -87,10 +737,93 @@ def convert_image_type(image, image_type):
         image.convert("RGB").save(f, format=image_type)
         return f.getvalue()
 
+def reflink_file(src_path, dst_path):
+    # Returns whether a copy-on-write clone (reflink) was made, which shares the data of the source file
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        with open(src_path, "rb") as src_file, open(dst_path, "wb") as dst_file:
+            fcntl.ioctl(dst_file.fileno(), 0x40049409, src_file.fileno()) # FICLONE
+        return True
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(dst_path)
+        return False
+
+def clone_file(src_path, dst_path):
+    # Use a reflink where the filesystem supports it, else fall back to a full copy
+    if not reflink_file(src_path, dst_path):
+        shutil.copyfile(src_path, dst_path)
+
+# Temporary files are hidden so an interrupted copy is never scanned as a duplicate song
+temp_file_suffixes = (".linking", ".unsharing")
+
+def get_temp_file_path(file_path, suffix):
+    directory, file_name = os.path.split(file_path)
+    return os.path.join(directory, f".{file_name}{suffix}")
+
+def remove_temp_files(directory):
+    # Remove temporary files left behind by an interrupted sync
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(temp_file_suffixes):
+                with contextlib.suppress(OSError):
+                    os.remove(entry.path)
+
+def link_file(src_path, dst_path):
+    # Prefer a hard link, else a reflink or copy
+    temp_path = get_temp_file_path(dst_path, ".linking")
+    try:
+        os.link(src_path, temp_path)
+    except OSError:
+        clone_file(src_path, temp_path)
+    os.replace(temp_path, dst_path)
+
+def unshare_file(file_path):
+    # Break hard links so tag changes only apply to this copy of the song
+    if os.stat(file_path).st_nlink <= 1:
+        return
+    temp_path = get_temp_file_path(file_path, ".unsharing")
+    clone_file(file_path, temp_path)
+    os.replace(temp_path, file_path)
+
+def get_tag_padding_budget(tags):
+    # Reserve enough padding for covers and lyrics to be regenerated and other tags to change without rewriting the file
+    cover_size = sum(len(frame.data) for frame in tags.getall("APIC"))
+    lyrics_size = sum(len(frame.text.encode()) for frame in tags.getall("USLT"))
+    lyrics_size += sum(len(text.encode()) + 4 for frame in tags.getall("SYLT") for text, _ in frame.text)
+    return min(8192 + cover_size // 4 + lyrics_size // 2, 1024 * 1024)
+
+def get_enrichment_padding(config: dict):
+    # Room left for cover art and lyrics that are added later by the enrichment queue
+    include_metadata = config["include_metadata"]
+    padding = 0
+    if include_metadata["cover"]:
+        padding += 256 * 1024 if config["image_format"] == "jpeg" else 1024 * 1024
+    if include_metadata["lyrics"]:
+        padding += 32 * 1024
+    return padding
+
+def save_tags(tags, file_path, reserved_padding: int=0):
+    unshare_file(file_path)
+
+    def get_padding(padding_info):
+        if padding_info.padding >= reserved_padding:
+            # Keep existing padding so the tag is updated in place
+            stat_key = "in_place"
+            padding = padding_info.padding
+        else:
+            stat_key = "rewrite"
+            padding = get_tag_padding_budget(tags) + reserved_padding
+        record_tag_save(stat_key)
+        return padding
+
+    tags.save(file_path, v2_version=3, padding=get_padding)
+
 def update_track_num(file_path, track_num):
     tags = id3.ID3(file_path)
     tags.add(id3.TRCK(encoding=3, text=str(track_num)))
-    tags.save(v2_version=3)
+    save_tags(tags, file_path)
 
 def update_file_order(playlist_name, song_file_info, track_num, config: dict, missing_video: bool):
     # Fix name if mismatching
@@ -138,12 +871,17 @@ def get_metadata_dict(tags, config: dict):
     tag_list = flatten(get_metadata_map().values()) + list(config["custom_metadata"].keys())
     return {tag: tags.getall(tag) for tag in tag_list}
 
-def valid_metadata(config: dict, metadata_dict: dict):
+def valid_metadata(config: dict, metadata_dict: dict, skip_enrichment: bool=False):
     include_metadata = config["include_metadata"].copy()
 
     # WOAR URL is required to identify video
     include_metadata["url"] = True
 
+    if skip_enrichment:
+        # Cover art and lyrics are added later
+        include_metadata["cover"] = False
+        include_metadata["lyrics"] = False
+
     selected_tags = flatten([value for key, value in get_metadata_map().items() if include_metadata[key]])
 
     # Add custom metadata tags if a corresponding value is specified
@@ -153,10 +891,9 @@ def valid_metadata(config: dict, metadata_dict: dict):
 
     return all([value for tag, value in metadata_dict.items() if tag in selected_tags])
 
-def get_song_info_ytdl(track_num, config: dict):
-    # Get ytdl for song info
+def get_song_info_ytdl_opts(track_num, config: dict):
     name_format = config["name_format"]
-    if config["track_num_in_name"]:
+    if config["track_num_in_name"] and track_num is not None:
         name_format = f"{track_num}. {name_format}"
 
     ytdl_opts = {
@@ -167,6 +904,7 @@ def get_song_info_ytdl(track_num, config: dict):
         "cookiefile": None if config["cookie_file"] == "" else config["cookie_file"],
         "cookiesfrombrowser": None if config["cookies_from_browser"] == "" else tuple(config["cookies_from_browser"].split(":")),
         "extractor_args": config["extractor_args"],
+        "allowed_extractors": allowed_extractors,
         "writesubtitles": True,
         "allsubtitles": True,
         "postprocessors": [{
@@ -176,17 +914,218 @@ def get_song_info_ytdl(track_num, config: dict):
         }]
     }
 
-    return YoutubeDL(ytdl_opts)
+    return ytdl_opts
+
+def get_song_info_ytdl(track_num, config: dict):
+    # Get ytdl for song info
+    return yt_dlp.YoutubeDL(get_song_info_ytdl_opts(track_num, config))
 
 def get_song_info(track_num, link, config: dict):
-    # Get song metadata from youtube
-    ytdl = get_song_info_ytdl(track_num, config)
-    return ytdl.extract_info(link, download=False)
+    # Get song metadata from youtube, the track num only affects file names so it is ignored for extraction
+    cassette_key = f"song:{link}"
+    if cassette is not None and cassette.mode == "replay":
+        with request_scheduler.slot("metadata"):
+            return cassette.replay_info(cassette_key)
+
+    with borrow_ytdl(get_song_info_ytdl_opts(None, config)) as ytdl, request_scheduler.slot("metadata"):
+        info_dict = ytdl.extract_info(link, download=False)
+
+    if cassette is not None:
+        cassette.record_info(cassette_key, info_dict)
+    return info_dict
 
 def get_subtitles_url(subtitles, lang):
     return next(sub for sub in subtitles[lang] if sub["ext"] == "json3")["url"]
 
-def generate_metadata(file_path, link, track_num, playlist_name, config: dict, regenerate_metadata: bool, force_update: bool):
+def get_cover_area(thumbnail: dict):
+    # Covers are cropped to 16:9 and then to a square
+    return min(thumbnail["height"], thumbnail["width"] * 9 / 16)
+
+def get_cover_thumbnails(info_dict: dict, config: dict):
+    # Thumbnails to try in order, from the smallest that still makes a cover of at least cover_size to the default thumbnail
+    default_thumbnail = {"url": info_dict.get("thumbnail")}
+    sized_thumbnails = [thumbnail for thumbnail in info_dict.get("thumbnails") or [] if thumbnail.get("url") and thumbnail.get("width") and thumbnail.get("height")]
+    for thumbnail in sized_thumbnails:
+        if thumbnail["url"] == default_thumbnail["url"]:
+            default_thumbnail = thumbnail
+    if config["cover_size"] <= 0:
+        return [default_thumbnail]
+
+    large_thumbnails = [thumbnail for thumbnail in sized_thumbnails if get_cover_area(thumbnail) >= config["cover_size"]]
+    large_thumbnails.sort(key=lambda thumbnail: (thumbnail["width"] * thumbnail["height"], -(thumbnail.get("preference") or 0)))
+    if default_thumbnail not in large_thumbnails:
+        large_thumbnails.append(default_thumbnail)
+    return large_thumbnails
+
+def download_cover_thumbnail(info_dict: dict, config: dict):
+    # Larger thumbnails are only tried if a smaller one cannot be downloaded
+    thumbnails = get_cover_thumbnails(info_dict, config)
+    for thumbnail in thumbnails:
+        response = http_get(thumbnail["url"], stream=True)
+        if response.ok:
+            break
+        if thumbnail is thumbnails[-1]:
+            response.raise_for_status()
+    content = response.content
+
+    # Estimate the bytes saved compared to the default thumbnail from the number of pixels
+    cover_bytes_saved = 0
+    default_thumbnail = thumbnails[-1]
+    if thumbnail is not default_thumbnail and "width" in default_thumbnail:
+        cover_bytes_saved = int(len(content) * (default_thumbnail["width"] * default_thumbnail["height"] / (thumbnail["width"] * thumbnail["height"]) - 1))
+    record_throughput(cover_bytes=len(content), cover_bytes_saved=max(0, cover_bytes_saved))
+    return Image.open(BytesIO(content))
+
+def get_cover_image_data(info_dict: dict, override_cover_file, config: dict):
+    # Generate thumbnail
+    if override_cover_file:
+        img = Image.open(override_cover_file)
+    else:
+        img = download_cover_thumbnail(info_dict, config)
+
+        # Ensure aspect ratio
+        target_ratio = [16, 9]
+        width, height = img.size
+        width_ratio = width / target_ratio[0]
+        height_ratio = height / target_ratio[1]
+        if width_ratio > height_ratio:
+            half_width = width / 2
+            min_offset = (height_ratio * target_ratio[0]) / 2
+            left = half_width - min_offset
+            right = half_width + min_offset
+            img = img.crop([left, 0, right, height])
+        elif height_ratio > width_ratio:
+            half_height = height / 2
+            min_offset = (width_ratio * target_ratio[1]) / 2
+            top = half_height - min_offset
+            bottom = half_height + min_offset
+            img = img.crop([0, top, width, bottom])
+
+    # Crop to square
+    width, height = img.size
+    half_width = width / 2
+    half_height = height / 2
+    min_offset = min(half_width, half_height)
+    left = half_width - min_offset
+    right = half_width + min_offset
+    top = half_height - min_offset
+    bottom = half_height + min_offset
+    return convert_image_type(img.crop([left, top, right, bottom]), config["image_format"])
+
+def get_lyrics(info_dict: dict, override_lyrics, config: dict):
+    # Returns the lyrics language and synced and unsynced lyrics, or None if overridden lyrics are invalid
+    if override_lyrics:
+        try:
+            synced_lyrics = [tuple(entry) for entry in override_lyrics]
+            unsynced_lyrics = [entry[0] for entry in override_lyrics]
+            return langcodes.Language.get("en").to_alpha3(), synced_lyrics, unsynced_lyrics
+        except Exception as e:
+            print(f"Unable to parse overridden lyrics: {e}")
+            return None
+
+    subtitles = info_dict.get("subtitles")
+    requested_subtitles = info_dict.get("requested_subtitles")
+    synced_lyrics = []
+    unsynced_lyrics = []
+    lang = "en"
+    lyrics_langs = config["lyrics_langs"]
+    strict_lang_match = config["strict_lang_match"]
+
+    # Filter out subtitles related to live chat
+    if requested_subtitles is not None:
+        requested_subtitles = {key: value for key, value in requested_subtitles.items() if not key.startswith("live")}
+
+    if subtitles and requested_subtitles and len(subtitles) > 0:
+        subtitles_url = None
+        try:
+            if len(lyrics_langs) == 0:
+                lang = next(iter(requested_subtitles))
+                subtitles_url = get_subtitles_url(subtitles, lang)
+                print(f"Selecting first available language for lyrics: {lang}")
+            else:
+                lyrics_found = False
+                for lyrics_lang in lyrics_langs:
+                    for requested_lang in requested_subtitles.keys():
+                        # Regex match full string
+                        if re.match(r"^" + lyrics_lang + r"$", requested_lang):
+                            subtitles_url = get_subtitles_url(subtitles, requested_lang)
+                            lang = requested_lang
+                            print(f"Selected language for lyrics: {lang}")
+                            lyrics_found = True
+                            break
+                    if lyrics_found:
+                        break
+
+                if subtitles_url is None:
+                    available_languages_str = str(list(requested_subtitles.keys()))
+                    print(f"Lyrics unavailable for selected languages. Available languages: {available_languages_str}")
+                    if not strict_lang_match:
+                        lang = next(iter(requested_subtitles))
+                        subtitles_url = get_subtitles_url(subtitles, lang)
+                        print(f"Selecting first available language for lyrics: {lang}")
+        except:
+            subtitles_url = None
+
+        if subtitles_url is not None:
+            response = None
+            try:
+                response = http_get(subtitles_url, stream=True)
+                content = json.loads(response.text)
+
+                last_timestamp = -1
+                last_lines = []
+
+                for event in content["events"]:
+                    timestamp = event["tStartMs"]
+                    line = ""
+                    for seg in event["segs"]:
+                        line += seg["utf8"]
+                    # Remove invalid characters
+                    line = line.replace("\u200b", "").replace("\u200c", "")
+
+                    if (timestamp - last_timestamp) < 1000 and line.strip() in last_lines:
+                        # Skip if line is repeated too quickly
+                        last_timestamp = timestamp
+                        continue
+
+                    if timestamp == last_timestamp:
+                        # Append line into previous line if same timestamp has multiple lines
+                        lyrics_line = list(synced_lyrics[-1])
+                        lyrics_line[0] += "\n" + line
+                        synced_lyrics[-1] = tuple(lyrics_line)
+
+                        unsynced_lyrics[-1] += "\n" + line
+
+                        last_lines.append(line.strip())
+                    else:
+                        synced_lyrics.append((line, timestamp))
+                        unsynced_lyrics.append(line)
+                        last_lines = [line.strip()]
+                    last_timestamp = timestamp
+            except Exception as e:
+                if response is not None:
+                    status = getattr(response, "status_code", None)
+                    reason = getattr(response, "reason", None)
+                    print(f"Unable to get lyrics. Status code: {status}, Reason: {reason}, Error: {e}")
+                else:
+                    print(f"Unable to get lyrics. Error: {e}")
+
+    try:
+        lang = langcodes.Language.get(lang).to_alpha3()
+    except:
+        print(f"Saving unrecognized lyrics language '{lang}' as 'en'")
+        lang = langcodes.Language.get("en").to_alpha3()
+
+    if len(synced_lyrics) == 0:
+        synced_lyrics = [("Lyrics unavailable", 0)]
+    if len(unsynced_lyrics) == 0:
+        unsynced_lyrics = ["Lyrics unavailable"]
+
+    return lang, synced_lyrics, unsynced_lyrics
+
+def generate_metadata(file_path, link, track_num, playlist_name, config: dict, regenerate_metadata: bool, force_update: bool, info_dict=None, skip_enrichment: bool=False):
+    # Song info is fetched if needed unless info_dict is given
+    # Cover art and lyrics are left to be added later if skip_enrichment is set
     try:
         tags = id3.ID3(file_path)
     except:
@@ -194,7 +1133,8 @@ def generate_metadata(file_path, link, track_num, playlist_name, config: dict, r
         force_update_file_name = ""
         if force_update:
             try:
-                info_dict = get_song_info(track_num, link, config)
+                if info_dict is None:
+                    info_dict = get_song_info(track_num, link, config)
                 info_dict_with_audio_ext = dict(info_dict)
                 info_dict_with_audio_ext["ext"] = config["audio_codec"]
                 force_update_file_name = get_song_info_ytdl(track_num, config).prepare_filename(info_dict_with_audio_ext)
@@ -213,24 +1153,23 @@ def generate_metadata(file_path, link, track_num, playlist_name, config: dict, r
                 tags.delall(tag)
                 metadata_dict[tag] = []
 
-    if regenerate_metadata or force_update or not valid_metadata(config, metadata_dict):
+    if regenerate_metadata or force_update or not valid_metadata(config, metadata_dict, skip_enrichment):
+        start_time = time.perf_counter()
         try:
-            info_dict = get_song_info(track_num, link, config)
+            if info_dict is None:
+                info_dict = get_song_info(track_num, link, config)
 
             if force_update:
                 info_dict_with_audio_ext = dict(info_dict)
                 info_dict_with_audio_ext["ext"] = config["audio_codec"]
                 force_update_file_name = get_song_info_ytdl(track_num, config).prepare_filename(info_dict_with_audio_ext)
 
-            thumbnail = info_dict.get("thumbnail")
             upload_date = info_dict.get("upload_date")
             title = info_dict.get("title")
             track = info_dict.get("track")
             uploader = info_dict.get("uploader")
             artist = info_dict.get("artist")
             album = info_dict.get("album")
-            subtitles = info_dict.get("subtitles")
-            requested_subtitles = info_dict.get("requested_subtitles")
 
             metadata_overrides = config.get("metadata_overrides") or {}
             override_title = metadata_overrides.get("title")
@@ -249,41 +1188,9 @@ def generate_metadata(file_path, link, track_num, playlist_name, config: dict, r
             include_metadata = config["include_metadata"]
 
             # These tags will not be regenerated in case of config changes
-            if (not metadata_dict["APIC:Front cover"] or override_cover_file) and include_metadata["cover"]:
+            if (not metadata_dict["APIC:Front cover"] or override_cover_file) and include_metadata["cover"] and not skip_enrichment:
                 # Generate thumbnail
-                if override_cover_file:
-                    img = Image.open(override_cover_file)
-                else:
-                    img = Image.open(requests.get(thumbnail, stream=True).raw)
-
-                    # Ensure aspect ratio
-                    target_ratio = [16, 9]
-                    width, height = img.size
-                    width_ratio = width / target_ratio[0]
-                    height_ratio = height / target_ratio[1]
-                    if width_ratio > height_ratio:
-                        half_width = width / 2
-                        min_offset = (height_ratio * target_ratio[0]) / 2
-                        left = half_width - min_offset
-                        right = half_width + min_offset
-                        img = img.crop([left, 0, right, height])
-                    elif height_ratio > width_ratio:
-                        half_height = height / 2
-                        min_offset = (width_ratio * target_ratio[1]) / 2
-                        top = half_height - min_offset
-                        bottom = half_height + min_offset
-                        img = img.crop([0, top, width, bottom])
-
-                # Crop to square
-                width, height = img.size
-                half_width = width / 2
-                half_height = height / 2
-                min_offset = min(half_width, half_height)
-                left = half_width - min_offset
-                right = half_width + min_offset
-                top = half_height - min_offset
-                bottom = half_height + min_offset
-                img_data = convert_image_type(img.crop([left, top, right, bottom]), config["image_format"])
+                img_data = get_cover_image_data(info_dict, override_cover_file, config)
                 tags.add(id3.APIC(3, f"image/{config['image_format']}", 3, "Front cover", img_data))
 
             if not metadata_dict["TRCK"] and include_metadata["track"]:
@@ -295,112 +1202,15 @@ def generate_metadata(file_path, link, track_num, playlist_name, config: dict, r
             if not metadata_dict["WOAR"]:
                 tags.add(id3.WOAR(link))
 
-            if include_metadata["lyrics"] and (not metadata_dict["SYLT"] or not metadata_dict["USLT"]):
-                if override_lyrics:
-                    try:
-                        synced_lyrics = [tuple(entry) for entry in override_lyrics]
-                        unsynced_lyrics = [entry[0] for entry in override_lyrics]
-                        tags.add(id3.SYLT(encoding=3, lang=lang, format=2, type=1, text=synced_lyrics))
-                        tags.add(id3.USLT(encoding=3, lang=lang, text="\n".join(unsynced_lyrics)))
-                    except Exception as e:
-                        print(f"Unable to parse overridden lyrics: {e}")
-                else:
-                    synced_lyrics = []
-                    unsynced_lyrics = []
-                    lang = "en"
-                    lyrics_langs = config["lyrics_langs"]
-                    strict_lang_match = config["strict_lang_match"]
-
-                    # Filter out subtitles related to live chat
-                    if requested_subtitles is not None:
-                        requested_subtitles = {key: value for key, value in requested_subtitles.items() if not key.startswith("live")}
-
-                    if subtitles and requested_subtitles and len(subtitles) > 0:
-                        subtitles_url = None
-                        try:
-                            if len(lyrics_langs) == 0:
-                                lang = next(iter(requested_subtitles))
-                                subtitles_url = get_subtitles_url(subtitles, lang)
-                                print(f"Selecting first available language for lyrics: {lang}")
-                            else:
-                                lyrics_found = False
-                                for lyrics_lang in lyrics_langs:
-                                    for requested_lang in requested_subtitles.keys():
-                                        # Regex match full string
-                                        if re.match(r"^" + lyrics_lang + r"$", requested_lang):
-                                            subtitles_url = get_subtitles_url(subtitles, requested_lang)
-                                            lang = requested_lang
-                                            print(f"Selected language for lyrics: {lang}")
-                                            lyrics_found = True
-                                            break
-                                    if lyrics_found:
-                                        break
-
-                                if subtitles_url is None:
-                                    available_languages_str = str(list(requested_subtitles.keys()))
-                                    print(f"Lyrics unavailable for selected languages. Available languages: {available_languages_str}")
-                                    if not strict_lang_match:
-                                        lang = next(iter(requested_subtitles))
-                                        subtitles_url = get_subtitles_url(subtitles, lang)
-                                        print(f"Selecting first available language for lyrics: {lang}")
-                        except:
-                            subtitles_url = None
-
-                        if subtitles_url is not None:
-                            response = None
-                            try:
-                                response = requests.get(subtitles_url, stream=True)
-                                content = json.loads(response.text)
-
-                                last_timestamp = -1
-                                last_lines = []
-
-                                for event in content["events"]:
-                                    timestamp = event["tStartMs"]
-                                    line = ""
-                                    for seg in event["segs"]:
-                                        line += seg["utf8"]
-                                    # Remove invalid characters
-                                    line = line.replace("\u200b", "").replace("\u200c", "")
-
-                                    if (timestamp - last_timestamp) < 1000 and line.strip() in last_lines:
-                                        # Skip if line is repeated too quickly
-                                        last_timestamp = timestamp
-                                        continue
-
-                                    if timestamp == last_timestamp:
-                                        # Append line into previous line if same timestamp has multiple lines
-                                        lyrics_line = list(synced_lyrics[-1])
-                                        lyrics_line[0] += "\n" + line
-                                        synced_lyrics[-1] = tuple(lyrics_line)
-
-                                        unsynced_lyrics[-1] += "\n" + line
-
-                                        last_lines.append(line.strip())
-                                    else:
-                                        synced_lyrics.append((line, timestamp))
-                                        unsynced_lyrics.append(line)
-                                        last_lines = [line.strip()]
-                                    last_timestamp = timestamp
-                            except Exception as e:
-                                if response is not None:
-                                    status = getattr(response, "status_code", None)
-                                    reason = getattr(response, "reason", None)
-                                    print(f"Unable to get lyrics. Status code: {status}, Reason: {reason}, Error: {e}")
-                                else:
-                                    print(f"Unable to get lyrics. Error: {e}")
-
-                    try:
-                        lang = Language.get(lang).to_alpha3()
-                    except:
-                        print(f"Saving unrecognized lyrics language '{lang}' as 'en'")
-                        lang = Language.get("en").to_alpha3()
-
-                    if len(synced_lyrics) == 0:
-                        synced_lyrics = [("Lyrics unavailable", 0)]
-                    if len(unsynced_lyrics) == 0:
-                        unsynced_lyrics = ["Lyrics unavailable"]
+            # Expected length is used to verify songs are complete
+            song_duration = get_song_duration(info_dict, config)
+            if not tags.getall("TLEN") and song_duration:
+                tags.add(id3.TLEN(encoding=3, text=str(int(song_duration * 1000))))
 
+            if include_metadata["lyrics"] and (not metadata_dict["SYLT"] or not metadata_dict["USLT"]) and not skip_enrichment:
+                lyrics = get_lyrics(info_dict, override_lyrics, config)
+                if lyrics is not None:
+                    lang, synced_lyrics, unsynced_lyrics = lyrics
                     tags.add(id3.SYLT(encoding=3, lang=lang, format=2, type=1, text=synced_lyrics))
                     tags.add(id3.USLT(encoding=3, lang=lang, text="\n".join(unsynced_lyrics)))
 
@@ -439,9 +1249,10 @@ def generate_metadata(file_path, link, track_num, playlist_name, config: dict, r
                     except Exception as e:
                         print(f"Unable to add custom metadata tag '{tag}' with value '{value}'. Error: {e}")
 
-            tags.save(v2_version=3)
+            save_tags(tags, file_path, get_enrichment_padding(config) if skip_enrichment else 0)
         except Exception as e:
             raise Exception(f"Unable to update song metadata: {e}")
+        record_throughput(metadata_updates=1, metadata_seconds=time.perf_counter() - start_time)
 
     return force_update_file_name
 
@@ -465,7 +1276,19 @@ def parse_time_str(time_str, default: float):
     print(f"Using default time value '{default}' due to invalid time format in configs: '{time_str}'")
     return default
 
-def download_song(link, playlist_name, track_num, config: dict):
+def get_song_duration(info_dict: dict, config: dict):
+    # Length of the song after trimming to start_time and end_time, or None if unknown
+    duration = info_dict.get("duration")
+    if not duration:
+        return None
+    start_time = parse_time_str(config.get("start_time"), default=0.0)
+    end_time = parse_time_str(config.get("end_time"), default=float("inf"))
+    start_time = max(0.0, duration + start_time if start_time < 0 else start_time)
+    end_time = min(duration, duration + end_time if end_time < 0 else end_time)
+    return max(0.0, end_time - start_time)
+
+def download_song(link, playlist_name, track_num, config: dict, embed_cover: bool=True):
+    # The cover is only embedded while downloading if embed_cover is set and single_pass_ffmpeg is used
     directory = os.path.join(os.getcwd(), playlist_name)
     name_format = config["name_format"]
     if config["track_num_in_name"]:
@@ -478,6 +1301,7 @@ def download_song(link, playlist_name, track_num, config: dict):
         "cookiefile": None if config["cookie_file"] == "" else config["cookie_file"],
         "cookiesfrombrowser": None if config["cookies_from_browser"] == "" else tuple(config["cookies_from_browser"].split(":")),
         "extractor_args": config["extractor_args"],
+        "allowed_extractors": allowed_extractors,
         "postprocessors": [{
             "key": "FFmpegExtractAudio",
             "preferredcodec": config["audio_codec"],
@@ -486,76 +1310,379 @@ def download_song(link, playlist_name, track_num, config: dict):
         "geo_bypass": True
     }
 
+    if bandwidth_limiter.is_limited():
+        ytdl_opts["progress_hooks"] = [create_bandwidth_hook()]
+
     if not config["verbose"]:
         ytdl_opts["quiet"] = True
         ytdl_opts["external_downloader_args"] = ["-loglevel", "panic"]
 
+    # Extract with a shared extractor and download separately so media transfers do not hold up metadata requests
+    # The extracted info is returned so it can be reused to generate metadata
+    extraction_error = None
+    try:
+        info_dict = get_song_info(track_num, link, config)
+    except Exception as e:
+        # Kept so the reason the video is unavailable is reported
+        extraction_error = e
+        info_dict = None
+
+    single_pass = info_dict is not None and use_single_pass_ffmpeg(config)
     start_time_str = config.get("start_time")
     end_time_str = config.get("end_time")
-    if start_time_str or end_time_str:
-        start_time = parse_time_str(start_time_str, default=0.0)
-        end_time = parse_time_str(end_time_str, default=float("inf"))
-
-        ytdl_opts["download_ranges"] = utils.download_range_func(None, [(start_time, end_time)])
+    start_time = parse_time_str(start_time_str, default=0.0)
+    end_time = parse_time_str(end_time_str, default=float("inf"))
+    if (start_time_str or end_time_str) and not single_pass:
+        ytdl_opts["download_ranges"] = yt_dlp.utils.download_range_func(None, [(start_time, end_time)])
         ytdl_opts["force_keyframes_at_cuts"] = True
 
-    with YoutubeDL(ytdl_opts) as ytdl:
-        file_path_collector = FilePathCollector()
+    cover_file = None
+    single_pass_audio = None
+    if single_pass:
+        # Times from the end of the song are resolved with the duration as ffmpeg cuts from the start
+        duration = info_dict.get("duration")
+        if duration:
+            start_time = max(0.0, duration + start_time) if start_time < 0 else start_time
+            end_time = duration + end_time if end_time < 0 else end_time
+
+        metadata_overrides = config.get("metadata_overrides") or {}
+        if embed_cover and config["include_metadata"]["cover"]:
+            try:
+                cover_file = os.path.join(directory, f".cover-{info_dict['id']}.{config['image_format']}")
+                with open(cover_file, "wb") as f:
+                    f.write(get_cover_image_data(info_dict, metadata_overrides.get("cover"), config))
+            except Exception as e:
+                # The cover is added with the other tags instead
+                print(f"Unable to embed cover while downloading '{link}': {e}")
+                if os.path.exists(cover_file):
+                    os.remove(cover_file)
+                cover_file = None
+        padding = 40 * 1024 if cover_file is not None else 8 * 1024 + get_enrichment_padding(config)
+
+        ytdl_opts["postprocessors"] = []
+        single_pass_audio = get_single_pass_audio_class()(config["audio_codec"], config["audio_quality"], start_time, end_time, cover_file, padding)
+
+    with yt_dlp.YoutubeDL(ytdl_opts) as ytdl:
+        if single_pass_audio is not None:
+            ytdl.add_post_processor(single_pass_audio)
+        file_path_collector = create_file_path_collector()
         ytdl.add_post_processor(file_path_collector)
-        result = ytdl.download([link])
+
+        result = 1
+        if info_dict is not None and cassette is not None and cassette.mode == "replay":
+            # Recorded audio is copied to where it would have been downloaded
+            try:
+                media_file = cassette.find_media(get_content_store_key(info_dict["id"], config))
+                if media_file is None:
+                    raise Exception(f"No recorded audio for '{link}'")
+                info_dict_with_audio_ext = dict(info_dict)
+                info_dict_with_audio_ext["ext"] = Path(media_file).suffix[1:]
+                file_path_collector.file_paths.append(ytdl.prepare_filename(info_dict_with_audio_ext))
+                with request_scheduler.slot("media"):
+                    cassette.replay_media(media_file, file_path_collector.file_paths[0])
+            finally:
+                if cover_file is not None and os.path.exists(cover_file):
+                    os.remove(cover_file)
+            result = 0
+        elif info_dict is not None:
+            try:
+                with request_scheduler.slot("media") as release_media_slot:
+                    # The slot is not needed while the audio is converted
+                    ytdl.add_progress_hook(lambda progress: release_media_slot() if progress.get("status") == "finished" else None)
+                    ytdl.process_ie_result(copy.deepcopy(info_dict), download=True)
+            finally:
+                if cover_file is not None and os.path.exists(cover_file):
+                    os.remove(cover_file)
+            result = 0
+
         if len(file_path_collector.file_paths) == 0:
+            if extraction_error is not None:
+                raise Exception(f"Unable to get video info - {extraction_error}") from extraction_error
             raise Exception("No file download path found, video may be unavailable")
         file_path = file_path_collector.file_paths[0]
+        if cassette is not None and cassette.mode == "record" and result == 0:
+            cassette.record_media(get_content_store_key(info_dict["id"], config), file_path)
+
+    return result, file_path, info_dict
+
+def get_content_store_key(video_id, config: dict):
+    # Songs can only be shared between playlists with the same audio settings
+    audio_settings = [config["audio_format"], config["audio_codec"], config["audio_quality"], config["start_time"], config["end_time"]]
+    audio_settings_hash = hashlib.sha1(json.dumps(audio_settings).encode()).hexdigest()[:12]
+    return f"{video_id}-{audio_settings_hash}"
 
-    return result, file_path
+# Audio codecs may not match the extension of the stored song, such as 'vorbis' songs ending in '.ogg'
+content_store_extensions = ["mp3", "m4a", "opus", "ogg", "flac", "wav", "aac", "webm", "mka"]
 
-def download_song_and_update(video_info, playlist, link, playlist_name, track_num, config: dict):
+def find_stored_song(video_id, config: dict):
+    content_store = config["content_store"]
+    if not content_store:
+        return None
+
+    # Songs are stored by key so they are found without listing the whole store
+    key = get_content_store_key(video_id, config)
+    for extension in [config["audio_codec"]] + content_store_extensions:
+        stored_file_path = os.path.join(content_store, f"{key}.{extension}")
+        if os.path.exists(stored_file_path):
+            return stored_file_path
+    return None
+
+def get_song_sources_file(video_id, config: dict):
+    return os.path.join(config["content_store"], f"{get_content_store_key(video_id, config)}.json")
+
+def read_song_sources(video_id, config: dict):
+    try:
+        with open(get_song_sources_file(video_id, config), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+def find_song_source(video_id, config: dict):
+    # Songs that could not be stored are copied from another playlist that has them instead
+    if not config["content_store"]:
+        return None
+
+    for source_file_path in read_song_sources(video_id, config):
+        source_playlist_name, source_file_name = os.path.split(source_file_path)
+        song_file_info = get_song_file_info(source_playlist_name, source_file_name)
+        if song_file_info is not None and song_file_info.video_id == video_id:
+            return source_file_path
+
+        # Song may have been renamed since it was recorded
+        try:
+            song_file_info = get_song_file_infos(source_playlist_name).get(video_id)
+        except Exception:
+            continue
+        if song_file_info is not None:
+            return song_file_info.file_path
+    return None
+
+def add_song_source(file_path, video_id, playlist_name, config: dict):
+    source_file_path = os.path.abspath(os.path.join(playlist_name, os.path.basename(file_path)))
+    source_file_paths = read_song_sources(video_id, config)
+    if source_file_path in source_file_paths:
+        return
+
+    # Only the latest file of each playlist is kept
+    source_playlist_name = os.path.dirname(source_file_path)
+    source_file_paths = [path for path in source_file_paths if os.path.dirname(path) != source_playlist_name]
+    source_file_paths.append(source_file_path)
+    write_work_file(get_song_sources_file(video_id, config), source_file_paths)
+
+def store_song(file_path, video_id, playlist_name, config: dict):
+    # Store songs before any tags are written so stored songs can be reused for any playlist
+    # A separate copy would double the size of every song, so songs are only stored where they can be reflinked
+    # Otherwise the playlist file is recorded so other playlists copy it from there
+    content_store = config["content_store"]
+    Path(content_store).mkdir(parents=True, exist_ok=True)
+    stored_file_path = os.path.join(content_store, get_content_store_key(video_id, config) + Path(file_path).suffix)
+    temp_path = get_temp_file_path(stored_file_path, ".linking")
+    if reflink_file(file_path, temp_path):
+        os.replace(temp_path, stored_file_path)
+    else:
+        add_song_source(file_path, video_id, playlist_name, config)
+
+def restore_stored_song(stored_file_path, info_dict: dict, playlist_name, track_num, config: dict, remove_tags: bool=False):
+    info_dict_with_audio_ext = dict(info_dict)
+    info_dict_with_audio_ext["ext"] = Path(stored_file_path).suffix[1:]
+    file_name = get_song_info_ytdl(track_num, config).prepare_filename(info_dict_with_audio_ext)
+    file_path = os.path.join(playlist_name, file_name)
+    if remove_tags:
+        # Tags of the other playlist are removed so the metadata is generated for this playlist
+        temp_path = get_temp_file_path(file_path, ".linking")
+        clone_file(stored_file_path, temp_path)
+        id3.delete(temp_path)
+        os.replace(temp_path, file_path)
+    else:
+        link_file(stored_file_path, file_path)
+    return file_path
+
+def get_staging_folder_name(playlist_name):
+    # Each playlist gets its own folder in the staging directory
+    return hashlib.sha1(os.path.abspath(playlist_name).encode()).hexdigest()[:12]
+
+def get_directory_size(directory):
+    size = 0
+    for root, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            try:
+                size += os.path.getsize(os.path.join(root, file_name))
+            except OSError:
+                pass
+    return size
+
+class StagingUsage:
+    # Running total of bytes in each staging directory so it is not walked for every song
+    # Measured at the start of each sync and updated as songs are staged and published
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sizes = {}
+
+    def measure(self, staging_dir):
+        size = get_directory_size(staging_dir)
+        with self.lock:
+            self.sizes[staging_dir] = size
+
+    def add(self, staging_dir, size: int):
+        with self.lock:
+            self.sizes[staging_dir] = max(0, self.sizes.get(staging_dir, 0) + size)
+
+    def get(self, staging_dir):
+        with self.lock:
+            size = self.sizes.get(staging_dir)
+        if size is None:
+            self.measure(staging_dir)
+            return self.get(staging_dir)
+        return size
+
+staging_usage = StagingUsage()
+
+def clean_staging_dir(playlist_name, config: dict):
+    # Remove songs left behind in the staging directory by an interrupted sync
+    if config["staging_dir"]:
+        shutil.rmtree(os.path.join(config["staging_dir"], get_staging_folder_name(playlist_name)), ignore_errors=True)
+        staging_usage.measure(config["staging_dir"])
+
+def get_staging_dir(playlist_name, config: dict):
+    # Returns the folder to download and tag a song in before it is published to the playlist folder
+    # Songs are downloaded straight to the playlist folder if staging is disabled or the staging directory is full
+    staging_dir = config["staging_dir"]
+    if not staging_dir:
+        return None
+    if config["staging_limit"] > 0 and staging_usage.get(staging_dir) >= config["staging_limit"] * 1024 * 1024:
+        return None
+    song_staging_dir = os.path.join(staging_dir, get_staging_folder_name(playlist_name))
+    Path(song_staging_dir).mkdir(parents=True, exist_ok=True)
+    return song_staging_dir
+
+def publish_staged_song(staged_file_path, playlist_name):
+    # Copied next to the destination and renamed so the playlist folder never has a partial song
+    file_path = os.path.join(playlist_name, os.path.basename(staged_file_path))
+    link_file(staged_file_path, file_path)
+    os.remove(staged_file_path)
+    return file_path
+
+def download_song_and_update(video_info, playlist_title, link, playlist_name, track_num, config: dict, skip_enrichment: bool=False):
+    start_time = time.perf_counter()
     file_path = None
+    staging_dir = get_staging_dir(playlist_name, config)
+    staged_size = 0
     try:
-        result, file_path = download_song(link, playlist_name, track_num, config)
+        info_dict = None
+        stored_file_path = find_stored_song(video_info.video_id, config)
+        source_file_path = find_song_source(video_info.video_id, config) if stored_file_path is None else None
+        if stored_file_path is not None or source_file_path is not None:
+            # Reuse a song downloaded for another playlist
+            print(f"Using stored copy of '{link}'")
+            info_dict = get_song_info(track_num, link, config)
+            if stored_file_path is not None:
+                file_path = restore_stored_song(stored_file_path, info_dict, staging_dir or playlist_name, track_num, config)
+            else:
+                file_path = restore_stored_song(source_file_path, info_dict, staging_dir or playlist_name, track_num, config, True)
+                try:
+                    add_song_source(file_path, video_info.video_id, playlist_name, config)
+                except OSError as e:
+                    print(f"Unable to record '{link}' in the content store: {e}")
+        else:
+            # Songs kept in the content store are stored untagged so the cover is not embedded
+            result, file_path, info_dict = download_song(link, staging_dir or playlist_name, track_num, config, not skip_enrichment and not config["content_store"])
 
-        # Check download failed and video is unavailable
-        if result != 0 and video_info["channel_id"] is None:
-            # Video title indicates availability of video such as '[Private Video]'
-            raise Exception(f"Video is unavailable - {video_info['title']}")
+            # Check download failed and video is unavailable
+            if result != 0 and video_info.channel_id is None:
+                # Video title indicates availability of video such as '[Private Video]'
+                raise VideoUnavailableError(f"Video is unavailable - {video_info.title}")
 
-        generate_metadata(file_path, link, track_num, playlist["title"], config, False, False)
+            if config["content_store"]:
+                try:
+                    store_song(file_path, video_info.video_id, playlist_name, config)
+                except OSError as e:
+                    print(f"Unable to store a copy of '{link}' in the content store: {e}")
+
+        if staging_dir is not None:
+            staged_size = os.path.getsize(file_path)
+            staging_usage.add(config["staging_dir"], staged_size)
+        generate_metadata(file_path, link, track_num, playlist_title, config, False, False, info_dict, skip_enrichment)
+        if staging_dir is not None:
+            file_path = publish_staged_song(file_path, playlist_name)
     except Exception as e:
         error_message = f"Unable to download video number {track_num} '{link}': {e}"
-        return error_message, track_num
-    return None, track_num
+        failure_kind = classify_failure(e)
+        if staging_dir is not None and file_path is not None and os.path.exists(file_path) and os.path.dirname(os.path.abspath(file_path)) == os.path.abspath(staging_dir):
+            os.remove(file_path)
+        return error_message, track_num, failure_kind
+    finally:
+        # The staged song has been published or removed by now
+        if staged_size > 0:
+            staging_usage.add(config["staging_dir"], -staged_size)
 
-def update_song(video_info, song_file_info, file_path, link, track_num, playlist_name, config: dict, regenerate_metadata: bool, force_update: bool):
-    # Generate metadata just in case it is missing
+    try:
+        record_throughput(downloads=1, download_seconds=time.perf_counter() - start_time, bytes=os.path.getsize(file_path), audio_seconds=(info_dict or {}).get("duration") or 0)
+    except OSError:
+        pass
+    return None, track_num, None
+
+def get_song_update(video_info, song_file_info, file_path, link, track_num, playlist_name, config: dict, regenerate_metadata: bool, force_update: bool, skip_enrichment: bool=False):
+    # Returns the error message if any and the file path to rename the song to if its name is incorrect
+    # The rename is left to the caller so this can run in a separate process
     video_unavailable = False
     error_message = []
+    rename_file_path = None
     try:
-        force_update_file_name = generate_metadata(file_path, link, track_num, playlist_name, config, regenerate_metadata, force_update)
+        force_update_file_name = generate_metadata(file_path, link, track_num, playlist_name, config, regenerate_metadata, force_update, None, skip_enrichment)
         if force_update:
             force_update_file_path = os.path.join(playlist_name, force_update_file_name)
             if file_path != force_update_file_path:
                 # Track name needs updating to proper format
-                print(f"Renaming incorrect file name from '{Path(file_path).stem}' to '{Path(force_update_file_path).stem}'")
-                os.rename(file_path, force_update_file_path)
+                rename_file_path = force_update_file_path
     except Exception as e:
         error_message.append(f"Unable to update metadata for #{track_num} '{link}': {e}")
         if "This video is not available" in str(e):
             video_unavailable = True
 
     # Check if video is unavailable
-    if video_info["channel_id"] is None or video_unavailable:
+    if video_info.channel_id is None or video_unavailable:
         if len(error_message) == 0:
             # Metadata was obtained successfully but some information is missing
             error_message.append(f"Unable to fully update metadata for #{track_num} '{link}'")
         error_text = f"The previous song '{song_file_info.name}' is unavailable but a local copy exists"
-        if not video_unavailable and video_info['title'] is not None and video_info['title'] != "":
+        if not video_unavailable and video_info.title is not None and video_info.title != "":
             # Video title indicates availability of video such as '[Private Video]'
-            error_text += f" - {video_info['title']}"
+            error_text += f" - {video_info.title}"
         error_message.append(error_text)
 
     if len(error_message) > 0:
-        return "\n".join(error_message)
-    return None
+        return "\n".join(error_message), rename_file_path
+    return None, rename_file_path
+
+def apply_song_update(file_path, link, track_num, error_message, rename_file_path):
+    if rename_file_path is not None:
+        try:
+            print(f"Renaming incorrect file name from '{Path(file_path).stem}' to '{Path(rename_file_path).stem}'")
+            os.rename(file_path, rename_file_path)
+        except Exception as e:
+            rename_error_message = f"Unable to update metadata for #{track_num} '{link}': {e}"
+            error_message = rename_error_message if error_message is None else f"{rename_error_message}\n{error_message}"
+    return error_message
+
+def update_song(video_info, song_file_info, file_path, link, track_num, playlist_name, config: dict, regenerate_metadata: bool, force_update: bool, skip_enrichment: bool=False):
+    # Generate metadata just in case it is missing
+    error_message, rename_file_path = get_song_update(video_info, song_file_info, file_path, link, track_num, playlist_name, config, regenerate_metadata, force_update, skip_enrichment)
+    return apply_song_update(file_path, link, track_num, error_message, rename_file_path)
+
+def init_update_process(request_limits: dict, request_rate_limits: dict, bandwidth_limit: float, bandwidth_schedule: list, bandwidth_state, update_cassette=None):
+    # Request limits apply to each update process separately, the bandwidth limit is shared with the syncing process
+    global cassette
+    request_scheduler.configure(request_limits, request_rate_limits)
+    bandwidth_limiter.configure(bandwidth_limit, bandwidth_schedule)
+    bandwidth_limiter.use_state(bandwidth_state)
+    cassette = update_cassette
+
+def get_process_song_update(*args):
+    # Runs get_song_update in an update process and also returns the stats it recorded so they can be added to the syncing process
+    stats = SyncStats()
+    current_sync_stats.set(stats)
+    result = get_song_update(*args)
+    return (result, *stats.get())
 
 def format_file_name(file_name):
     return re.sub(r"[\\/:*?\"<>|]", "_", file_name)
@@ -570,9 +1697,171 @@ def get_video_id_from_metadata(tags):
 
     return get_url_parameter(str(links[0]), "v")
 
-def get_song_file_info(playlist_name, song_file_name):
+def decode_syncsafe_int(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+def decode_id3_frame(frame_id, data):
+    # URL frames have no encoding byte, text frames may contain multiple null separated values
+    if frame_id.startswith("W"):
+        return data.split(b"\x00")[0].decode("latin-1")
+
+    # Invalid frames raise ValueError so the tags are read with mutagen instead
+    encodings = ["latin-1", "utf-16", "utf-16-be", "utf-8"]
+    if len(data) == 0 or data[0] >= len(encodings):
+        raise ValueError(f"Unsupported ID3 text frame for {frame_id}")
+    encoding = encodings[data[0]]
+
+    # Each value is decoded on its own like mutagen does, as UTF-16 values each start with their own byte order mark
+    terminator = b"\x00\x00" if encoding.startswith("utf-16") else b"\x00"
+    values = []
+    start = 1
+    while start < len(data):
+        end = data.find(terminator, start)
+        # UTF-16 terminators start on a character boundary
+        while end != -1 and (end - start) % len(terminator) != 0:
+            end = data.find(terminator, end + 1)
+        if end == -1:
+            end = len(data)
+        try:
+            values.append(data[start:end].decode(encoding))
+        except UnicodeDecodeError as e:
+            raise ValueError(f"Unsupported ID3 text frame for {frame_id}") from e
+        start = end + len(terminator)
+    return "\u0000".join(values)
+
+def read_id3_frames(file_path, frame_ids, stop_frame_ids=None):
+    # Reads only the given frames from an ID3v2.3/2.4 tag while seeking past other frames such as covers and lyrics
+    # Stops reading once all stop_frame_ids (default: frame_ids) are found
+    # Returns None if there is no tag and raises ValueError for tags this reader does not support
+    frame_ids = set(frame_ids)
+    stop_frame_ids = frame_ids if stop_frame_ids is None else set(stop_frame_ids)
+    frames = {}
+    with open(file_path, "rb") as f:
+        header = f.read(10)
+        if len(header) < 10 or header[:3] != b"ID3":
+            return None
+
+        version = header[3]
+        flags = header[5]
+        if version not in [3, 4] or flags & 0x80:
+            # Older versions and unsynchronised tags are not supported
+            raise ValueError("Unsupported ID3 tag format")
+        tag_end = 10 + decode_syncsafe_int(header[6:10])
+
+        if flags & 0x40:
+            # Skip extended header
+            extended_header = f.read(4)
+            if version == 4:
+                f.seek(decode_syncsafe_int(extended_header) - 4, os.SEEK_CUR)
+            else:
+                f.seek(int.from_bytes(extended_header, "big"), os.SEEK_CUR)
+
+        while f.tell() + 10 <= tag_end:
+            frame_header = f.read(10)
+            if len(frame_header) < 10 or frame_header[0] == 0:
+                # Reached padding
+                break
+
+            frame_id = frame_header[:4].decode("latin-1")
+            frame_size = decode_syncsafe_int(frame_header[4:8]) if version == 4 else int.from_bytes(frame_header[4:8], "big")
+            if frame_id not in frame_ids:
+                f.seek(frame_size, os.SEEK_CUR)
+                continue
+
+            if frame_header[9] != 0:
+                # Compressed, encrypted, grouped or unsynchronised frames are not supported
+                raise ValueError(f"Unsupported ID3 frame format for {frame_id}")
+            frames.setdefault(frame_id, []).append(decode_id3_frame(frame_id, f.read(frame_size)))
+            if stop_frame_ids.issubset(frames.keys()):
+                break
+
+    return frames
+
+def get_trust_file_name_ids(config: dict):
+    # File names only contain the video id in a known place if the name format ends with it
+    return config["trust_file_name_ids"] and config["name_format"].endswith("-%(id)s.%(ext)s")
+
+def get_video_id_from_file_name(file_name):
+    # The default name format ends with '-VIDEO_ID.ext'
+    match = re.search(r"-([A-Za-z0-9_-]{11})\.[^.]+$", file_name)
+    return match.group(1) if match else None
+
+class SongFileInfoCache:
+    # Least recently used song file infos are dropped once the cache is full so daemon runs do not grow forever
+    def __init__(self, max_size: int):
+        self.lock = threading.Lock()
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+
+    def get(self, song_file_path):
+        with self.lock:
+            entry = self.entries.get(song_file_path)
+            if entry is not None:
+                self.entries.move_to_end(song_file_path)
+            return entry
+
+    def put(self, song_file_path, entry):
+        with self.lock:
+            self.entries[song_file_path] = entry
+            self.entries.move_to_end(song_file_path)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+# Enough for the songs of all playlists synced by a daemon in most libraries
+song_file_info_cache = SongFileInfoCache(100000)
+
+def get_song_file_info(playlist_name, song_file_name, trust_file_name_ids: bool=False, stat=None):
     song_file_path = os.path.join(playlist_name, song_file_name)
 
+    # Reuse previously read info for files that have not changed since
+    try:
+        if stat is None:
+            stat = os.stat(song_file_path)
+    except OSError:
+        return None
+    cache_key = (stat.st_mtime_ns, stat.st_size, trust_file_name_ids)
+    cached_entry = song_file_info_cache.get(song_file_path)
+    if cached_entry is not None and cached_entry[0] == cache_key:
+        return cached_entry[1]
+
+    song_file_info = read_song_file_info(song_file_name, song_file_path, trust_file_name_ids)
+    song_file_info_cache.put(song_file_path, (cache_key, song_file_info))
+    return song_file_info
+
+def read_song_file_info(song_file_name, song_file_path, trust_file_name_ids: bool=False):
+    # Only the identity frames are read from the tag header
+    # If trusted, the video id in the file name is checked against the WOAR tag and the full tags are read if they differ
+    file_name_video_id = get_video_id_from_file_name(song_file_name) if trust_file_name_ids else None
+    try:
+        frames = read_id3_frames(song_file_path, ["WOAR", "TIT2", "TRCK"])
+    except ValueError:
+        return read_song_file_info_from_tags(song_file_name, song_file_path)
+    except OSError:
+        return None
+
+    if frames is None:
+        # File is not considered a song file if it contains no metadata
+        return None
+
+    try:
+        if len(frames.get("WOAR", [])) != 1:
+            raise Exception("WOAR tag is in an invalid format")
+        song_video_id = get_url_parameter(frames["WOAR"][0], "v")
+        song_name = frames["TIT2"][0] if "TIT2" in frames else song_file_name
+        song_track_num = int(frames["TRCK"][0]) if "TRCK" in frames else 0
+    except Exception as e:
+        print(f"Song file '{song_file_name}' is in an invalid format and will be ignored")
+        return None
+
+    if file_name_video_id is not None and file_name_video_id != song_video_id:
+        return read_song_file_info_from_tags(song_file_name, song_file_path)
+    return SongFileInfo(song_video_id, song_name, song_file_name, song_file_path, song_track_num)
+
+def read_song_file_info_from_tags(song_file_name, song_file_path):
     try:
         tags = id3.ID3(song_file_path)
     except:
@@ -581,7 +1870,7 @@ def get_song_file_info(playlist_name, song_file_name):
 
     try:
         song_video_id = get_video_id_from_metadata(tags)
-        song_name = tags.get("TIT2", song_file_name)
+        song_name = str(tags.get("TIT2", song_file_name))
         song_track_num = int(str(tags.get("TRCK", 0)))
     except Exception as e:
         print(f"Song file '{song_file_name}' is in an invalid format and will be ignored")
@@ -589,11 +1878,24 @@ def get_song_file_info(playlist_name, song_file_name):
 
     return SongFileInfo(song_video_id, song_name, song_file_name, song_file_path, song_track_num)
 
-def get_song_file_infos(playlist_name):
+def get_song_file_infos(playlist_name, trust_file_name_ids: bool=False):
     song_file_infos = {}
     duplicate_files = {}
-    for file_name in os.listdir(playlist_name):
-        song_file_info = get_song_file_info(playlist_name, file_name)
+    with os.scandir(playlist_name) as entries:
+        file_entries = [entry for entry in entries if entry.is_file() and not entry.name.endswith(temp_file_suffixes)]
+
+    # Tags are read in parallel as scanning is mostly waiting on disk or network shares
+    def scan_entry(entry):
+        try:
+            stat = entry.stat()
+        except OSError:
+            return None
+        return get_song_file_info(playlist_name, entry.name, trust_file_name_ids, stat)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4)) as scan_executor:
+        scanned_song_file_infos = list(scan_executor.map(scan_entry, file_entries))
+
+    for song_file_info in scanned_song_file_infos:
         if song_file_info is None:
             continue
 
@@ -629,9 +1931,301 @@ def get_song_file_infos(playlist_name):
 
     return song_file_infos
 
+enrichment_queue_file_name = ".enrichment_queue.json"
+
+failures_file_name = ".failures.json"
+
+# Permanent failures will not go away by retrying soon, such as private, deleted or geo blocked videos
+permanent_failure_backoff = 24*60*60
+permanent_failure_max_backoff = 30*24*60*60
+
+# Other failures are retried at the end of the sync with an increasing delay between attempts
+download_retries = 3
+download_retry_delay = 5
+
+class VideoUnavailableError(Exception):
+    pass
+
+def classify_failure(error):
+    # Failures are classified by their yt-dlp error type or HTTP status, anything else is assumed to go away on a retry
+    while error is not None:
+        if isinstance(error, (VideoUnavailableError, yt_dlp.utils.GeoRestrictedError, yt_dlp.utils.UnsupportedError)):
+            return "permanent"
+        if isinstance(error, yt_dlp.networking.exceptions.HTTPError):
+            return "permanent" if error.status in (404, 410) else "transient"
+        if isinstance(error, yt_dlp.utils.DownloadError) and error.exc_info is not None:
+            # Raised by yt-dlp in place of the error of the extractor or downloader
+            error = error.exc_info[1]
+        elif isinstance(error, yt_dlp.utils.ExtractorError) and error.cause is not None and error.cause is not error:
+            error = error.cause
+        else:
+            error = error.__cause__
+    return "transient"
+
+def load_failures(playlist_name):
+    # Songs that failed to download by video id with the kind of failure, number of attempts and time to retry
+    try:
+        with open(os.path.join(playlist_name, failures_file_name), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Unable to read failed downloads, all songs will be tried again: {e}")
+        return {}
+
+def save_failures(playlist_name, failures: dict, video_ids: set):
+    # Songs that were removed from the playlist are forgotten
+    failures = {video_id: failure for video_id, failure in failures.items() if video_id in video_ids}
+    failures_file = os.path.join(playlist_name, failures_file_name)
+    if failures:
+        write_config(failures_file, failures)
+    elif os.path.exists(failures_file):
+        os.remove(failures_file)
+
+def record_failure(failures: dict, previous_failures: dict, video_id, error_message, kind):
+    # Permanent failures are not tried again until their backoff expires
+    # Attempts are counted once per sync, from the failures loaded at its start, however often the song is retried
+    failure = previous_failures.get(video_id) or {"attempts": 0}
+    attempts = failure["attempts"] + 1
+    backoff = min(permanent_failure_max_backoff, permanent_failure_backoff * 2 ** (attempts - 1)) if kind == "permanent" else 0
+    failures[video_id] = {"kind": kind, "message": error_message, "attempts": attempts, "next_retry": int(time.time() + backoff)}
+
+def get_skipped_failure(failures: dict, video_id):
+    # Returns the failure if the song should not be downloaded yet
+    failure = failures.get(video_id)
+    if failure is not None and failure["kind"] == "permanent" and failure["next_retry"] > time.time():
+        return failure
+    return None
+
+song_index_file_name = ".song_index.json"
+
+def save_song_index(playlist_name, playlist_title, base_config: dict):
+    # Track nums and files of all songs so a single song can be updated without fetching the playlist or scanning the folder
+    # Songs without a track num or sharing one with another song are left out and updated with a full sync instead
+    song_file_infos = get_song_file_infos(playlist_name, get_trust_file_name_ids(base_config))
+    songs = {}
+    duplicate_track_nums = set()
+    for song_file_info in song_file_infos.values():
+        if song_file_info.track_num <= 0:
+            continue
+        if str(song_file_info.track_num) in songs:
+            duplicate_track_nums.add(str(song_file_info.track_num))
+        songs[str(song_file_info.track_num)] = [song_file_info.video_id, song_file_info.file_name]
+    for track_num in duplicate_track_nums:
+        del songs[track_num]
+
+    write_config(os.path.join(playlist_name, song_index_file_name), {
+        "playlist_title": playlist_title,
+        "songs": songs
+    })
+
+def find_indexed_song(playlist_name, track_num, base_config: dict):
+    # Returns the playlist title and song file info of a track, or None if the index is missing or out of date
+    try:
+        with open(os.path.join(playlist_name, song_index_file_name), "r") as f:
+            song_index = json.load(f)
+        video_id, file_name = song_index["songs"][str(track_num)]
+    except Exception:
+        return None
+
+    # Only the indexed file is read to check it is still the same song
+    song_file_info = get_song_file_info(playlist_name, file_name, get_trust_file_name_ids(base_config))
+    if song_file_info is None or song_file_info.video_id != video_id or song_file_info.track_num != track_num:
+        return None
+    return song_index["playlist_title"], song_file_info
+
+def load_enrichment_queue(playlist_name):
+    # Video ids of songs still waiting for cover art and lyrics, in order of download
+    try:
+        with open(os.path.join(playlist_name, enrichment_queue_file_name), "r") as f:
+            return dict.fromkeys(json.load(f))
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Unable to read enrichment queue, cover art and lyrics will be added on the next metadata update: {e}")
+        return {}
+
+def save_enrichment_queue(playlist_name, enrichment_queue: dict):
+    queue_file = os.path.join(playlist_name, enrichment_queue_file_name)
+    if enrichment_queue:
+        write_config(queue_file, list(enrichment_queue))
+    elif os.path.exists(queue_file):
+        os.remove(queue_file)
+
+def enrich_songs(playlist_name, playlist_title, enrichment_queue: dict, base_config: dict, check_cancelled):
+    # Add cover art and lyrics one song at a time after the playlist is already usable
+    song_file_infos = get_song_file_infos(playlist_name, get_trust_file_name_ids(base_config))
+    print(f"Adding cover art and lyrics for {len(enrichment_queue)} song(s)...")
+    try:
+        for i, video_id in enumerate(list(enrichment_queue)):
+            check_cancelled()
+
+            song_file_info = song_file_infos.get(video_id)
+            if song_file_info is None:
+                # Song was removed from the playlist folder
+                del enrichment_queue[video_id]
+                continue
+
+            link = f"https://www.youtube.com/watch?v={video_id}"
+            config = get_override_config(video_id, base_config)
+            try:
+                generate_metadata(song_file_info.file_path, link, song_file_info.track_num, playlist_title, config, False, False)
+                del enrichment_queue[video_id]
+            except Exception as e:
+                # Kept in the queue to be retried on the next sync
+                print(f"Unable to add cover art and lyrics for '{link}': {e}")
+
+            if (i + 1) % 10 == 0:
+                save_enrichment_queue(playlist_name, enrichment_queue)
+    finally:
+        save_enrichment_queue(playlist_name, enrichment_queue)
+
+verify_cache_file_name = ".verify_cache.json"
+corrupt_dir_name = ".corrupt"
+
+# Layer III bitrates in kbps and sample rates in Hz by MPEG version bits
+mp3_bitrates = {
+    3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+}
+mp3_sample_rates = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+def get_mp3_frame_info(header):
+    # Returns the frame length, samples per frame, sample rate and side info size of a Layer III frame header, or None if invalid
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_index in [0, 15] or sample_rate_index == 3:
+        return None
+
+    bitrate = mp3_bitrates[3 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate = mp3_sample_rates[version][sample_rate_index]
+    padding = (header[2] >> 1) & 0x01
+    mono = (header[3] >> 6) == 3
+    if version == 3:
+        return 144 * bitrate // sample_rate + padding, 1152, sample_rate, 17 if mono else 32
+    return 72 * bitrate // sample_rate + padding, 576, sample_rate, 9 if mono else 17
+
+def verify_song_file(file_path):
+    # Checks the frame headers of an mp3 file without decoding the audio
+    # Returns None if the file is intact or the reason it is not
+    try:
+        recorded_length = read_id3_frames(file_path, ["TLEN"])
+    except ValueError:
+        recorded_length = None
+    recorded_duration = None
+    if recorded_length and "TLEN" in recorded_length:
+        try:
+            recorded_duration = int(recorded_length["TLEN"][0]) / 1000
+        except ValueError:
+            pass
+
+    with open(file_path, "rb") as f:
+        data = f.read()
+
+    # Audio starts after the ID3v2 tag and ends before an ID3v1 tag if any
+    audio_start = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        audio_start = 10 + decode_syncsafe_int(data[6:10]) + (10 if data[5] & 0x10 else 0)
+    audio_end = len(data) - 128 if data[-128:-125] == b"TAG" else len(data)
+
+    # Skip padding written after the tag by some encoders
+    while audio_start < audio_end and data[audio_start] == 0:
+        audio_start += 1
+
+    first_frame_info = get_mp3_frame_info(data[audio_start:audio_start + 4])
+    if first_frame_info is None:
+        return "No audio frames found"
+
+    # The first frame may be a Xing/Info header with the frame and byte counts of the whole stream
+    xing_frames = None
+    xing_bytes = None
+    xing_offset = audio_start + 4 + first_frame_info[3]
+    offset = audio_start
+    if data[xing_offset:xing_offset + 4] in [b"Xing", b"Info"]:
+        xing_flags = int.from_bytes(data[xing_offset + 4:xing_offset + 8], "big")
+        field_offset = xing_offset + 8
+        if xing_flags & 0x01:
+            xing_frames = int.from_bytes(data[field_offset:field_offset + 4], "big")
+            field_offset += 4
+        if xing_flags & 0x02:
+            xing_bytes = int.from_bytes(data[field_offset:field_offset + 4], "big")
+        offset += first_frame_info[0]
+
+    if xing_bytes is not None and audio_end - audio_start < xing_bytes:
+        return f"Truncated audio ({audio_end - audio_start} of {xing_bytes} bytes)"
+
+    frame_count = 0
+    duration = 0.0
+    while offset < audio_end:
+        frame_info = get_mp3_frame_info(data[offset:offset + 4])
+        if frame_info is None:
+            if audio_end - offset < 4 or data[offset:offset + 3] in [b"APE", b"LYR"]:
+                # Trailing bytes or other tag formats after the last frame
+                break
+            return f"Invalid audio frame at byte {offset}"
+        if offset + frame_info[0] > audio_end:
+            return f"Truncated audio frame at byte {offset}"
+        frame_count += 1
+        duration += frame_info[1] / frame_info[2]
+        offset += frame_info[0]
+
+    if xing_frames is not None and frame_count + 1 < xing_frames:
+        return f"Missing audio frames ({frame_count} of {xing_frames})"
+    if recorded_duration is not None and abs(duration - recorded_duration) > max(2.0, recorded_duration * 0.01):
+        return f"Duration of {duration:.1f}s does not match the expected {recorded_duration:.1f}s"
+    return None
+
+def verify_playlist(playlist_name, executor):
+    # Verifies the songs in a playlist folder and moves broken songs out so they are downloaded again on the next update
+    # Results are cached by file size and modified time so unchanged files are only verified once
+    cache_file = os.path.join(playlist_name, verify_cache_file_name)
+    try:
+        with open(cache_file, "r") as f:
+            verify_cache = json.load(f)
+    except Exception:
+        verify_cache = {}
+
+    song_file_infos = get_song_file_infos(playlist_name)
+    file_names = sorted(song_file_info.file_name for song_file_info in song_file_infos.values() if song_file_info.file_name.lower().endswith(".mp3"))
+    new_verify_cache = {}
+    verify_tasks = {}
+    for file_name in file_names:
+        stat = os.stat(os.path.join(playlist_name, file_name))
+        cached_result = verify_cache.get(file_name)
+        if cached_result is not None and cached_result["mtime_ns"] == stat.st_mtime_ns and cached_result["size"] == stat.st_size:
+            new_verify_cache[file_name] = cached_result
+        else:
+            new_verify_cache[file_name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "error": None}
+            verify_tasks[file_name] = executor.submit(verify_song_file, os.path.join(playlist_name, file_name))
+
+    for file_name, task in verify_tasks.items():
+        try:
+            new_verify_cache[file_name]["error"] = task.result()
+        except OSError as e:
+            new_verify_cache[file_name]["error"] = f"Unable to read file: {e}"
+
+    broken_file_names = [file_name for file_name in file_names if new_verify_cache[file_name]["error"] is not None]
+    if broken_file_names:
+        Path(playlist_name, corrupt_dir_name).mkdir(exist_ok=True)
+    for file_name in broken_file_names:
+        print(f"Song '{file_name}' is broken and will be downloaded again on the next update: {new_verify_cache[file_name]['error']}")
+        os.replace(os.path.join(playlist_name, file_name), os.path.join(playlist_name, corrupt_dir_name, file_name))
+        del new_verify_cache[file_name]
+
+    write_config(cache_file, new_verify_cache)
+    print(f"Verified {len(verify_tasks)} song(s) in '{playlist_name}' ({len(file_names) - len(verify_tasks)} unchanged), {len(broken_file_names)} broken song(s) moved to '{corrupt_dir_name}'")
+    return broken_file_names
+
 def setup_include_metadata_config():
     return {key: True for key in get_metadata_map().keys() if key != "url"}
 
+def setup_request_limits_config():
+    return {key: 0 for key in ["media", "metadata", "cover", "lyrics"]}
+
 def setup_custom_metadata(config: dict):
     if "custom_metadata" not in config or not isinstance(config["custom_metadata"], dict):
         return {}
@@ -706,10 +2300,31 @@ def copy_config(src_config: dict, dst_config: dict, only_validate: bool=False, m
             elif only_validate and src_config[key]:
                 raise Exception(f"Invalid config value type for key '{key}', expected {dst_type.__name__} but got {src_type.__name__}: {src_config[key]}")
 
+def is_full_override_copy(override_config: dict, override_template: dict):
+    # Overrides were saved as full copies of the template before they were stored as diffs
+    # Nobody sets every metadata override by hand, so a complete set means the override was copied
+    metadata_overrides = override_config.get("metadata_overrides")
+    return isinstance(metadata_overrides, dict) and all(key in metadata_overrides for key in override_template["metadata_overrides"])
+
+def get_config_diff(config: dict, base_config: dict):
+    # Only keep values that differ from the base config so overrides are stored sparsely
+    config_diff = {}
+    for key, value in config.items():
+        if isinstance(value, dict) and isinstance(base_config.get(key), dict):
+            sub_dict_diff = {sub_key: sub_value for sub_key, sub_value in value.items() if base_config[key].get(sub_key) != sub_value or sub_key not in base_config[key]}
+            if sub_dict_diff:
+                config_diff[key] = sub_dict_diff
+        elif key not in base_config or base_config[key] != value:
+            config_diff[key] = value
+    return config_diff
+
 def get_override_config(video_id, base_config: dict):
+    if video_id not in base_config["overrides"]:
+        # Share the base config values as they are never modified per song
+        return {key: value for key, value in base_config.items() if key != "overrides"}
+
     config = copy.deepcopy(base_config)
-    if video_id in base_config["overrides"]:
-        copy_config(base_config["overrides"][video_id], config)
+    copy_config(base_config["overrides"][video_id], config)
     del config["overrides"]
 
     return config
@@ -728,6 +2343,23 @@ def setup_config(config: dict):
         "sync_folder_name": True,
         "use_threading": True,
         "thread_count": 0,
+        "update_executor": "thread",
+        "max_pending_tasks": 0,
+        "sync_interval": 0,
+        "request_limits": setup_request_limits_config(),
+        "request_rate_limits": setup_request_limits_config(),
+        "bandwidth_limit": 0,
+        "bandwidth_schedule": [],
+        "content_store": "",
+        "staging_dir": "",
+        "staging_limit": 0,
+        "trust_file_name_ids": False,
+        "fast_first": False,
+        "stream_playlist": False,
+        "single_pass_ffmpeg": False,
+        "work_queue": False,
+        "work_queue_workers": 0,
+        "schema_version": 0,
 
         "retain_missing_order": False,
         "name_format": "%(title)s-%(id)s.%(ext)s",
@@ -736,6 +2368,7 @@ def setup_config(config: dict):
         "audio_codec": "mp3",
         "audio_quality": "5",
         "image_format": "jpeg",
+        "cover_size": 0,
         "lyrics_langs": [],
         "strict_lang_match": False,
         "start_time": "",
@@ -758,7 +2391,7 @@ def setup_config(config: dict):
 
     # Create example song config override
     config_copy = copy.deepcopy(new_config)
-    excluded_override_keys = ["url", "reverse_playlist", "sync_folder_name", "use_threading", "thread_count", "overrides"]
+    excluded_override_keys = ["url", "reverse_playlist", "sync_folder_name", "use_threading", "thread_count", "update_executor", "max_pending_tasks", "sync_interval", "request_limits", "request_rate_limits", "bandwidth_limit", "bandwidth_schedule", "content_store", "staging_dir", "staging_limit", "trust_file_name_ids", "fast_first", "stream_playlist", "work_queue", "work_queue_workers", "schema_version", "overrides"]
     for excluded_override_key in excluded_override_keys:
         if excluded_override_key in config_copy:
             config_copy.pop(excluded_override_key)
@@ -779,13 +2412,16 @@ def setup_config(config: dict):
                     validate_config(override_config, new_override_config)
                 except Exception as e:
                     raise Exception(f"Error in override config for video id '{video_id}': {e}")
+                full_copy = is_full_override_copy(override_config, config_copy)
                 copy_config(override_config, new_override_config, minimal_copy=True)
-                new_config["overrides"][video_id] = new_override_config
+                # Values set in an override are kept even if they match the playlist config, only full copies are trimmed
+                new_config["overrides"][video_id] = get_config_diff(new_override_config, new_config) if full_copy else new_override_config
 
     return new_config
 
 def generate_default_config(config: dict, config_file_name: str):
     config = setup_config(config)
+    config["schema_version"] = schema_version
 
     # Get list of links in the playlist
     playlist = get_playlist_info(config)
@@ -796,18 +2432,409 @@ def generate_default_config(config: dict, config_file_name: str):
 
     write_config(os.path.join(playlist_name, config_file_name), config)
 
-def generate_playlist(base_config: dict, config_file_name: str, update: bool, force_update: bool, regenerate_metadata: bool, single_playlist: bool, current_playlist_name=None, track_num_to_update=None):
+def insert_retained_entries(playlist_entries: list, song_file_infos: dict, base_config: dict):
+    # Songs missing from the playlist that should retain index order get a dummy entry at their current position
+    playlist_video_ids = {video_info.video_id for video_info in playlist_entries if video_info is not None}
+    for video_id in song_file_infos.keys():
+        if video_id in playlist_video_ids:
+            continue
+        config = get_override_config(video_id, base_config)
+        if config["retain_missing_order"]:
+            # Insert dummy entry
+            index = song_file_infos[video_id].track_num - 1
+            if index > len(playlist_entries):
+                for i in range(index - len(playlist_entries)):
+                    playlist_entries.append(None)
+            playlist_entries.insert(index, PlaylistEntry(video_id, None, None))
+
+work_queue_dir_name = ".work_queue"
+work_queue_functions = ["download_song_and_update", "update_song"]
+work_claim_timeout = 30 * 60
+work_coordinator_timeout = 60
+work_worker_timeout = 60
+
+def write_work_file(file, data):
+    # Written to a temporary file first so other processes never read a partial file
+    temp_file = f"{file}.{socket.gethostname()}-{os.getpid()}.tmp"
+    write_config(temp_file, data)
+    os.replace(temp_file, file)
+
+def encode_work_value(value):
+    if isinstance(value, SongFileInfo):
+        return {"song_file_info": [value.video_id, value.name, value.file_name, value.file_path, value.track_num]}
+    if isinstance(value, PlaylistEntry):
+        return {"playlist_entry": [value.video_id, value.channel_id, value.title, value.duration]}
+    return {"value": value}
+
+def decode_work_value(value):
+    if "song_file_info" in value:
+        return SongFileInfo(*value["song_file_info"])
+    if "playlist_entry" in value:
+        return PlaylistEntry(*value["playlist_entry"])
+    return value["value"]
+
+def get_worker_command(playlist_name):
+    cassette_args = cassette.get_args() if cassette is not None else []
+    if getattr(sys, "frozen", False):
+        return [sys.executable, "--worker", playlist_name] + cassette_args
+    return [sys.executable, os.path.abspath(__file__), "--worker", playlist_name] + cassette_args
+
+class WorkQueue:
+    # Executor for song tasks that are stored in the playlist folder and claimed by worker processes with lock files
+    # Workers on other machines sharing the folder can join by running with --worker
+    def __init__(self, playlist_name, base_config: dict, local_workers: int):
+        self.queue_dir = os.path.join(playlist_name, work_queue_dir_name)
+        Path(self.queue_dir).mkdir(parents=True, exist_ok=True)
+        # Only one coordinator may use the queue, a lock that is no longer updated was left by a coordinator that stopped
+        self.coordinator_id = f"{socket.gethostname()}-{os.getpid()}-{id(self)}"
+        self.lock_file = os.path.join(self.queue_dir, "coordinator.lock")
+        if not create_lock_file(self.lock_file, self.coordinator_id, work_coordinator_timeout):
+            raise Exception(f"The work queue of '{playlist_name}' is in use by another sync")
+
+        # Tasks left by an interrupted run are discarded as the folder is rescanned on every sync
+        for file_name in os.listdir(self.queue_dir):
+            file_path = os.path.join(self.queue_dir, file_name)
+            if file_path == self.lock_file:
+                continue
+            if os.path.isdir(file_path):
+                shutil.rmtree(file_path, ignore_errors=True)
+            else:
+                os.remove(file_path)
+        for sub_dir in ("tasks", "claims", "results", "workers"):
+            Path(self.queue_dir, sub_dir).mkdir(parents=True, exist_ok=True)
+        self.queue_file = os.path.join(self.queue_dir, "queue.json")
+        write_work_file(self.queue_file, {
+            "playlist_name": playlist_name,
+            "request_limits": base_config["request_limits"],
+            "request_rate_limits": base_config["request_rate_limits"],
+            "bandwidth_limit": base_config["bandwidth_limit"],
+            "bandwidth_schedule": base_config["bandwidth_schedule"]
+        })
+
+        self.futures = {}
+        self.futures_lock = threading.Lock()
+        self.task_count = 0
+        self.stopped = threading.Event()
+        self.worker_processes = [subprocess.Popen(get_worker_command(playlist_name)) for _ in range(local_workers)]
+        self.poll_thread = threading.Thread(target=self.poll_results, daemon=True)
+        self.poll_thread.start()
+
+    def submit(self, fn, *args):
+        if fn.__name__ not in work_queue_functions:
+            raise ValueError(f"'{fn.__name__}' cannot be run by workers")
+
+        future = concurrent.futures.Future()
+        with self.futures_lock:
+            task_id = f"{self.task_count:06d}"
+            self.task_count += 1
+            self.futures[task_id] = future
+        write_work_file(os.path.join(self.queue_dir, "tasks", f"{task_id}.json"), {
+            "function": fn.__name__,
+            "args": [encode_work_value(arg) for arg in args]
+        })
+        return future
+
+    def poll_results(self):
+        last_heartbeat = 0
+        while not self.stopped.wait(0.5):
+            if time.monotonic() - last_heartbeat > work_coordinator_timeout / 10:
+                # Workers stop waiting for tasks if the coordinator stops updating the queue file
+                try:
+                    os.utime(self.queue_file)
+                    os.utime(self.lock_file)
+                    last_heartbeat = time.monotonic()
+                except OSError:
+                    pass
+
+            try:
+                result_files = set(os.listdir(os.path.join(self.queue_dir, "results")))
+            except OSError:
+                continue
+            with self.futures_lock:
+                finished_tasks = [(task_id, future) for task_id, future in self.futures.items() if f"{task_id}.json" in result_files]
+                for task_id, _ in finished_tasks:
+                    del self.futures[task_id]
+
+            for task_id, future in finished_tasks:
+                with open(os.path.join(self.queue_dir, "results", f"{task_id}.json"), "r") as f:
+                    result = json.load(f)
+                if "error" in result:
+                    future.set_exception(Exception(result["error"]))
+                else:
+                    future.set_result(decode_work_value(result["result"]))
+
+            if self.worker_processes and all(process.poll() is not None for process in self.worker_processes):
+                # Fail remaining tasks instead of waiting forever
+                with self.futures_lock:
+                    pending_futures = list(self.futures.values())
+                    self.futures.clear()
+                for future in pending_futures:
+                    future.set_exception(Exception("All local workers stopped unexpectedly"))
+
+    def shutdown(self, wait: bool=True, cancel_futures: bool=False):
+        if self.stopped.is_set():
+            return
+
+        # Workers exit once they see the queue is closed or cancelled
+        write_work_file(os.path.join(self.queue_dir, "cancelled" if cancel_futures else "closed"), {})
+        if cancel_futures:
+            with self.futures_lock:
+                for future in self.futures.values():
+                    future.cancel()
+                self.futures.clear()
+        if wait:
+            for process in self.worker_processes:
+                process.wait()
+        self.stopped.set()
+        self.poll_thread.join()
+        # The queue belongs to another coordinator if this one stopped updating the lock for too long
+        try:
+            with open(self.lock_file, "r") as f:
+                owns_queue = f.read() == self.coordinator_id
+        except OSError:
+            owns_queue = False
+        if owns_queue:
+            shutil.rmtree(self.queue_dir, ignore_errors=True)
+
+def create_lock_file(lock_file, owner_id, timeout: float):
+    # Creating the lock file fails if it already exists
+    try:
+        fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # Take over locks that have not been updated within the timeout, only one process can move the lock away
+        try:
+            if time.time() - os.path.getmtime(lock_file) < timeout:
+                return False
+            os.rename(lock_file, f"{lock_file}.{owner_id}.stale")
+        except OSError:
+            return False
+        return create_lock_file(lock_file, owner_id, timeout)
+
+    with os.fdopen(fd, "w") as f:
+        f.write(owner_id)
+    return True
+
+def claim_work_task(claims_dir, task_id, worker_id):
+    # Claims of workers that stopped without finishing the task are reclaimed
+    return create_lock_file(os.path.join(claims_dir, task_id), worker_id, work_claim_timeout)
+
+def count_work_workers(workers_dir):
+    # Workers that stopped updating their file are no longer running
+    count = 0
+    try:
+        file_names = os.listdir(workers_dir)
+    except OSError:
+        return 1
+    for file_name in file_names:
+        try:
+            if time.time() - os.path.getmtime(os.path.join(workers_dir, file_name)) < work_worker_timeout:
+                count += 1
+        except OSError:
+            pass
+    return max(1, count)
+
+def run_work_task(queue_dir, task_id):
+    claim_file = os.path.join(queue_dir, "claims", task_id)
+    stop_heartbeat = threading.Event()
+
+    def heartbeat():
+        # Keep the claim fresh so long downloads are not reclaimed by other workers
+        while not stop_heartbeat.wait(work_claim_timeout / 4):
+            try:
+                os.utime(claim_file)
+            except OSError:
+                pass
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        with open(os.path.join(queue_dir, "tasks", f"{task_id}.json"), "r") as f:
+            task = json.load(f)
+        if task["function"] not in work_queue_functions:
+            raise Exception(f"'{task['function']}' cannot be run by workers")
+        result = globals()[task["function"]](*[decode_work_value(arg) for arg in task["args"]])
+        task_result = {"result": encode_work_value(result)}
+    except Exception as e:
+        task_result = {"error": str(e)}
+    finally:
+        stop_heartbeat.set()
+    write_work_file(os.path.join(queue_dir, "results", f"{task_id}.json"), task_result)
+
+def run_worker(playlist_path, poll_interval: float=1.0):
+    # Claims and runs song tasks from the work queue of a playlist folder until the queue is closed
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    queue_dir = os.path.abspath(os.path.join(playlist_path, work_queue_dir_name))
+    queue_file = os.path.join(queue_dir, "queue.json")
+    print(f"Worker {worker_id} waiting for work in '{playlist_path}'...")
+    while True:
+        try:
+            with open(queue_file, "r") as f:
+                queue_info = json.load(f)
+            break
+        except (FileNotFoundError, ValueError):
+            time.sleep(poll_interval)
+
+    # Paths in tasks are relative to the working directory of the coordinator
+    playlist_dir = os.path.dirname(queue_dir)
+    os.chdir(playlist_dir if queue_info["playlist_name"] == "." else os.path.dirname(playlist_dir))
+    request_scheduler.configure(queue_info["request_limits"], queue_info["request_rate_limits"])
+
+    workers_dir = os.path.join(queue_dir, "workers")
+    worker_file = os.path.join(workers_dir, worker_id)
+    stop_heartbeat = threading.Event()
+
+    def register():
+        # Each worker gets an equal share of the bandwidth limit as workers cannot share memory
+        # Workers on other machines register in the same folder so their shares are counted too
+        try:
+            Path(worker_file).touch()
+        except OSError:
+            pass
+        bandwidth_limiter.configure(queue_info["bandwidth_limit"], queue_info["bandwidth_schedule"], count_work_workers(workers_dir))
+
+    def heartbeat():
+        while not stop_heartbeat.wait(work_worker_timeout / 10):
+            register()
+
+    register()
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        completed_count = process_work_queue(queue_dir, worker_id, poll_interval)
+    finally:
+        stop_heartbeat.set()
+        try:
+            os.remove(worker_file)
+        except OSError:
+            pass
+
+    print(f"Worker {worker_id} finished {completed_count} task(s)")
+
+def process_work_queue(queue_dir, worker_id, poll_interval: float):
+    # Runs tasks until the queue is closed or cancelled, or the coordinator stops updating it
+    queue_file = os.path.join(queue_dir, "queue.json")
+    last_heartbeat = None
+    last_heartbeat_time = time.monotonic()
+    completed_count = 0
+    while True:
+        try:
+            heartbeat = os.stat(queue_file).st_mtime_ns
+            if os.path.exists(os.path.join(queue_dir, "cancelled")):
+                break
+            closed = os.path.exists(os.path.join(queue_dir, "closed"))
+            task_ids = sorted(file_name[:-5] for file_name in os.listdir(os.path.join(queue_dir, "tasks")) if file_name.endswith(".json"))
+            result_files = set(os.listdir(os.path.join(queue_dir, "results")))
+        except FileNotFoundError:
+            # Queue was removed by the coordinator
+            break
+
+        if heartbeat != last_heartbeat:
+            last_heartbeat = heartbeat
+            last_heartbeat_time = time.monotonic()
+        elif time.monotonic() - last_heartbeat_time > work_coordinator_timeout:
+            print(f"Worker {worker_id} stopping as the coordinator is no longer running")
+            break
+
+        claimed = False
+        for task_id in task_ids:
+            if f"{task_id}.json" in result_files or not claim_work_task(os.path.join(queue_dir, "claims"), task_id, worker_id):
+                continue
+            claimed = True
+            run_work_task(queue_dir, task_id)
+            completed_count += 1
+            if os.path.exists(os.path.join(queue_dir, "cancelled")):
+                break
+
+        if not claimed:
+            if closed:
+                break
+            time.sleep(poll_interval)
+
+    return completed_count
+
+def collect_playlist_entries(entries, playlist_entries: list):
+    # Streamed entries are kept so track nums and missing songs can be finalized once the full list is known
+    try:
+        for entry in entries:
+            playlist_entry = get_playlist_entry(entry)
+            playlist_entries.append(playlist_entry)
+            yield playlist_entry
+    except Exception as e:
+        raise Exception(f"Failed to get all videos in playlist - {e}")
+
+def retag_song_file(playlist_name, playlist_title, song_file_info, base_config: dict, regenerate_metadata: bool, report):
+    # Returns the file path of the song after the update
+    video_id = song_file_info.video_id
+    link = f"https://www.youtube.com/watch?v={video_id}"
+    config = get_override_config(video_id, base_config)
+    file_path = os.path.join(playlist_name, song_file_info.file_name)
+    try:
+        # Update all metadata but do not update the track num to avoid resorting playlist
+        force_update_file_name = generate_metadata(file_path, link, song_file_info.track_num, playlist_title, config, regenerate_metadata, True)
+        force_update_file_path = os.path.join(playlist_name, force_update_file_name)
+        if file_path != force_update_file_path:
+            # Track name needs updating to proper format
+            print(f"Renaming incorrect file name from '{Path(file_path).stem}' to '{Path(force_update_file_path).stem}'")
+            os.rename(file_path, force_update_file_path)
+            report.record(video_id, song_file_info.track_num, "renamed")
+            return force_update_file_path
+        report.record(video_id, song_file_info.track_num, "updated")
+    except Exception as e:
+        print(f"Unable to update metadata: {e}")
+        report.record(video_id, song_file_info.track_num, "failed", str(e))
+    return file_path
+
+def generate_playlist(base_config: dict, config_file_name: str, update: bool, force_update: bool, regenerate_metadata: bool, single_playlist: bool, current_playlist_name=None, track_num_to_update=None, progress_callback=None, cancel_event=None):
+    # Returns a list of SongResult for the songs handled, progress_callback is called with each SongResult as it is recorded
+    # Setting cancel_event stops the sync before the next song and raises SyncCancelledError
+    report = SyncReport(progress_callback)
+
+    # Stats are recorded to the report of this sync, also by threads working on it
+    context = contextvars.copy_context()
+    context.run(current_sync_stats.set, report.stats)
+    with sync_limits.apply(base_config):
+        return context.run(run_playlist_sync, report, base_config, config_file_name, update, force_update, regenerate_metadata, single_playlist, current_playlist_name, track_num_to_update, cancel_event)
+
+def run_playlist_sync(report: SyncReport, base_config: dict, config_file_name: str, update: bool, force_update: bool, regenerate_metadata: bool, single_playlist: bool, current_playlist_name, track_num_to_update, cancel_event):
+    sync_start_time = time.perf_counter()
+
+    # Update a single song straight from the song index if it is up to date
+    if track_num_to_update is not None and (single_playlist or current_playlist_name is not None):
+        playlist_name = "." if single_playlist else current_playlist_name
+        indexed_song = find_indexed_song(playlist_name, track_num_to_update, base_config)
+        if indexed_song is not None:
+            playlist_title, song_file_info = indexed_song
+            write_config(os.path.join(playlist_name, config_file_name), base_config)
+            if retag_song_file(playlist_name, playlist_title, song_file_info, base_config, regenerate_metadata, report) != song_file_info.file_path:
+                save_song_index(playlist_name, playlist_title, base_config)
+            return report.get_results()
+
     # Get list of links in the playlist
-    playlist = get_playlist_info(base_config)
+    # Streaming starts downloads as playlist pages arrive, which needs the entries in their original order
+    retain_missing_order = base_config["retain_missing_order"] or any(override.get("retain_missing_order") for override in base_config["overrides"].values())
+    stream_playlist = base_config["stream_playlist"] and not base_config["reverse_playlist"] and not retain_missing_order
+    if stream_playlist:
+        playlist = get_playlist_info_stream(base_config)
+    else:
+        playlist = get_playlist_info(base_config)
     
-    if "entries" not in playlist:
+    if playlist.get("entries") is None:
         raise Exception("No videos found in playlist")
-    playlist_entries = playlist["entries"]
+    if stream_playlist:
+        # Entries are added to the list as they are received
+        playlist_entries = []
+        playlist_count = playlist.get("playlist_count")
+        playlist_entries_iter = collect_playlist_entries(playlist["entries"], playlist_entries)
+    else:
+        playlist_entries = [get_playlist_entry(entry) for entry in playlist["entries"]]
+        playlist_entries_iter = playlist_entries
+
+    # Only keep the playlist title to avoid holding the full playlist info for the whole run
+    playlist_title = playlist["title"]
+    del playlist
 
     if single_playlist:
         playlist_name = "."
     else:
-        playlist_name = format_file_name(playlist["title"])
+        playlist_name = format_file_name(playlist_title)
 
     # Prepare for downloading
     duplicate_name_index = 1
@@ -846,133 +2873,237 @@ def generate_playlist(base_config: dict, config_file_name: str, update: bool, fo
     playlist_name = adjusted_playlist_name
 
     # Update config for playlist
+    if not update:
+        # Songs in new playlists are always downloaded in the latest format
+        base_config["schema_version"] = schema_version
     write_config(os.path.join(playlist_name, config_file_name), base_config)
-    song_file_infos = get_song_file_infos(playlist_name) # May raise exception for duplicate songs
+    clean_staging_dir(playlist_name, base_config)
+    remove_temp_files(playlist_name)
+    song_file_infos = get_song_file_infos(playlist_name, get_trust_file_name_ids(base_config)) # May raise exception for duplicate songs
         
     track_num = 1
     skipped_videos = 0
-    updated_video_ids = []
+    updated_video_ids = set()
+
+    # Songs that still need cover art and lyrics, new songs are only added in fast-first mode
+    fast_first = base_config["fast_first"]
+    enrichment_queue = load_enrichment_queue(playlist_name)
+
+    # Songs that failed to download before and failed downloads to retry at the end of this sync
+    failures = load_failures(playlist_name)
+    previous_failures = dict(failures)
+    retry_queue = []
 
     # Insert dummy entries for songs that should retain index order
-    for video_id in song_file_infos.keys():
-        config = get_override_config(video_id, base_config)
-        if config["retain_missing_order"]:
-            found = False
-            for i, video_info in enumerate(playlist_entries):
-                if video_info is not None and video_info["id"] == video_id:
-                    found = True
-                    break
-            if not found:
-                # Insert dummy entry
-                index = song_file_infos[video_id].track_num - 1
-                if index > len(playlist_entries):
-                    for i in range(index - len(playlist_entries)):
-                        playlist_entries.append(None)
-                playlist_entries.insert(index, {"id": video_id, "channel_id": None, "title": None})
-
-    # Prepare threading executor
+    insert_retained_entries(playlist_entries, song_file_infos, base_config)
+
+    # Prepare threading executor or work queue
     download_executor = None
     update_executor = None
-    download_futures = []
-    update_futures = []
-    if base_config["use_threading"]:
+    task_window = None
+    results = {} # Error message of each downloaded track num
+    use_threading = base_config["use_threading"] or base_config["work_queue"]
+    if base_config["work_queue"]:
+        local_workers = base_config["work_queue_workers"]
+        if local_workers <= 0:
+            local_workers = os.cpu_count() or 1
+        download_executor = update_executor = WorkQueue(playlist_name, base_config, local_workers)
+
+        # Queued tasks are small files so all songs are queued at once for workers to claim
+        max_pending_tasks = base_config["max_pending_tasks"]
+        task_window = TaskWindow(max_pending_tasks if max_pending_tasks > 0 else sys.maxsize)
+    elif use_threading:
         thread_count = base_config["thread_count"]
         if thread_count <= 0:
-            thread_count = None
+            # Same default as ThreadPoolExecutor
+            thread_count = min(32, (os.cpu_count() or 1) + 4)
         download_executor = concurrent.futures.ThreadPoolExecutor(max_workers=thread_count)
-        update_executor = concurrent.futures.ThreadPoolExecutor(max_workers=thread_count)
-
-    # Download each item in the list
-    for i, video_info in enumerate(playlist_entries):
-        if video_info is None:
-            # Dummy spacer entry to retain index order
-            continue
-
-        track_num = i + 1 - skipped_videos
-        video_id = video_info["id"]
-        link = f"https://www.youtube.com/watch?v={video_id}"
-        song_file_info = song_file_infos.get(video_id)
-
-        # Song must be downloaded already and match the current track num when updating a single song
-        if track_num_to_update is not None and (song_file_info is None or song_file_info.track_num != track_num_to_update):
-            continue
-
-        config = get_override_config(video_id, base_config)
-        updated_video_ids.append(video_id)
+        if base_config["update_executor"] == "process":
+            # Metadata updates are mostly CPU bound so processes avoid contending for the GIL
+            # Processes are spawned rather than forked as the download threads are already running
+            process_count = base_config["thread_count"] if base_config["thread_count"] > 0 else os.cpu_count() or 1
+            update_executor = concurrent.futures.ProcessPoolExecutor(max_workers=process_count, mp_context=multiprocessing.get_context("spawn"), initializer=init_update_process, initargs=(base_config["request_limits"], base_config["request_rate_limits"], base_config["bandwidth_limit"], base_config["bandwidth_schedule"], bandwidth_limiter.share_state(), cassette))
+        else:
+            update_executor = concurrent.futures.ThreadPoolExecutor(max_workers=thread_count)
+
+        # Limit tasks in flight so memory usage does not grow with playlist size
+        max_pending_tasks = base_config["max_pending_tasks"]
+        if max_pending_tasks <= 0:
+            max_pending_tasks = thread_count * 2
+        task_window = TaskWindow(max_pending_tasks)
+
+    def on_download_result(video_id, retry_args, result):
+        error_message, track_num, failure_kind = result
+        # Replaces the result of an earlier attempt
+        results[track_num] = error_message
+        if error_message is not None:
+            print(error_message)
+            report.record(video_id, track_num, "failed", error_message)
+            record_failure(failures, previous_failures, video_id, error_message, failure_kind)
+            if failure_kind == "transient":
+                retry_queue.append((video_id, retry_args))
+        else:
+            report.record(video_id, track_num, "downloaded")
+            failures.pop(video_id, None)
+            if fast_first:
+                enrichment_queue[video_id] = None
+
+    def on_update_result(video_id, track_num, error_message):
+        if error_message is not None:
+            print(error_message)
+            report.record(video_id, track_num, "failed", error_message)
+            return
+        # Keep songs that were already reordered marked as renamed
+        song_result = report.song_results.get(video_id)
+        status = "renamed" if song_result is not None and song_result.status == "renamed" else "skipped"
+        report.record(video_id, track_num, status)
+
+    def on_process_update_result(video_id, track_num, file_path, link, result):
+        # Renames and stats are applied here as the update ran in a separate process
+        (error_message, rename_file_path), process_tag_saves, process_throughput = result
+        report.stats.add(process_tag_saves, process_throughput)
+        on_update_result(video_id, track_num, apply_song_update(file_path, link, track_num, error_message, rename_file_path))
+
+    def apply_file_order(video_id, song_file_info, track_num, config: dict, missing_video: bool):
+        file_path = update_file_order(playlist_name, song_file_info, track_num, config, missing_video)
+        if file_path != song_file_info.file_path or (song_file_info.track_num != track_num and config["include_metadata"]["track"]):
+            report.record_reorder(video_id, track_num)
+        return file_path
+
+    def check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            if use_threading:
+                download_executor.shutdown(cancel_futures=True)
+                update_executor.shutdown(cancel_futures=True)
+            raise SyncCancelledError("Playlist sync was cancelled")
 
-        # Update metadata for a single song
-        if track_num_to_update is not None:
-            if song_file_info is not None:
-                file_path = os.path.join(playlist_name, song_file_info.file_name)
-                try:
-                    # Update all metadata but do not update the track num to avoid resorting playlist
-                    force_update_file_name = generate_metadata(file_path, link, song_file_info.track_num, playlist["title"], config, regenerate_metadata, True)
-                    force_update_file_path = os.path.join(playlist_name, force_update_file_name)
-                    if file_path != force_update_file_path:
-                        # Track name needs updating to proper format
-                        print(f"Renaming incorrect file name from '{Path(file_path).stem}' to '{Path(force_update_file_path).stem}'")
-                        os.rename(file_path, force_update_file_path)
-                except Exception as e:
-                    print(f"Unable to update metadata: {e}")
-            else:
-                print(f"Unable to update metadata for '{link}': This song has not been downloaded yet, please update the playlist first")
+    try:
+        # Download each item in the list
+        for i, video_info in enumerate(playlist_entries_iter):
+            if video_info is None:
+                # Dummy spacer entry to retain index order
+                continue
 
-            # Updating single song finished
-            return
+            check_cancelled()
 
-        if song_file_info is None:
-            # Download audio if not downloaded
-            print(f"Downloading '{link}'... ({track_num}/{len(playlist_entries) - skipped_videos})")
-            
-            if base_config["use_threading"]:
-                download_futures.append(download_executor.submit(download_song_and_update, video_info, playlist, link, playlist_name, track_num, config))
+            track_num = i + 1 - skipped_videos
+            if stream_playlist:
+                # Total is only known once all pages have been received
+                song_count = playlist_count - skipped_videos if playlist_count else "?"
             else:
-                error_message, _ = download_song_and_update(video_info, playlist, link, playlist_name, track_num, config)
-                if error_message is not None:
-                    print(error_message)
-                    skipped_videos += 1
-        else:
-            # Skip downloading audio if already downloaded
-            print(f"Skipped downloading '{link}' ({track_num}/{len(playlist_entries) - skipped_videos})")
+                song_count = len(playlist_entries) - skipped_videos
+            video_id = video_info.video_id
+            link = f"https://www.youtube.com/watch?v={video_id}"
+            song_file_info = song_file_infos.get(video_id)
 
-            if base_config["use_threading"]:
-                # Defer updating track num when using threading
-                file_path = os.path.join(playlist_name, song_file_info.file_name)
-            else:
-                # Update track num and get file path
-                file_path = update_file_order(playlist_name, song_file_info, track_num, config, False)
+            # Song must be downloaded already and match the current track num when updating a single song
+            if track_num_to_update is not None and (song_file_info is None or song_file_info.track_num != track_num_to_update):
+                continue
 
-            # Generate metadata just in case it is missing
-            if base_config["use_threading"]:
-                update_futures.append(update_executor.submit(update_song, video_info, song_file_info, file_path, link, track_num, playlist["title"], config, regenerate_metadata, force_update))
-            else:
-                error_message = update_song(video_info, song_file_info, file_path, link, track_num, playlist["title"], config, regenerate_metadata, force_update)
-                if error_message is not None:
-                    print(error_message)
+            config = get_override_config(video_id, base_config)
+            updated_video_ids.add(video_id)
 
-    # Update track nums after download and update when using threading
-    if base_config["use_threading"]:
-        results = []
+            # Update metadata for a single song
+            if track_num_to_update is not None:
+                retag_song_file(playlist_name, playlist_title, song_file_info, base_config, regenerate_metadata, report)
+                save_song_index(playlist_name, playlist_title, base_config)
 
-        # Gather all results in order of submission
-        for index, task in enumerate(download_futures):
-            error_message, track_num = task.result()
-            results.append((error_message, track_num))
-            if error_message is not None:
-                print(error_message)
+                # Updating single song finished
+                return report.get_results()
 
-        for index, task in enumerate(update_futures):
-            error_message = task.result()
-            if error_message is not None:
+            skipped_failure = get_skipped_failure(failures, video_id) if song_file_info is None else None
+            if skipped_failure is not None:
+                # Skip songs that are known to be unavailable until it is time to try them again
+                error_message = f"Skipped downloading '{link}' until {time.strftime('%Y-%m-%d %H:%M', time.localtime(skipped_failure['next_retry']))} after {skipped_failure['attempts']} failed attempt(s): {skipped_failure['message']}"
                 print(error_message)
+                report.record(video_id, track_num, "failed", error_message)
+                if use_threading:
+                    results[track_num] = error_message
+                else:
+                    skipped_videos += 1
+            elif song_file_info is None:
+                # Download audio if not downloaded
+                print(f"Downloading '{link}'... ({track_num}/{song_count})")
+            
+                download_args = (video_info, playlist_title, link, playlist_name, track_num, config, fast_first)
+                if use_threading:
+                    task_window.submit(download_executor, functools.partial(on_download_result, video_id, download_args), download_song_and_update, *download_args)
+                else:
+                    error_message, _, failure_kind = download_song_and_update(*download_args)
+
+                    # Songs after this one are already numbered so failed downloads are retried right away
+                    retry_attempt = 0
+                    while error_message is not None and failure_kind == "transient" and retry_attempt < download_retries:
+                        print(f"{error_message}\nRetrying in {download_retry_delay * 2 ** retry_attempt}s...")
+                        time.sleep(download_retry_delay * 2 ** retry_attempt)
+                        check_cancelled()
+                        error_message, _, failure_kind = download_song_and_update(*download_args)
+                        retry_attempt += 1
+
+                    if error_message is not None:
+                        print(error_message)
+                        skipped_videos += 1
+                        report.record(video_id, track_num, "failed", error_message)
+                        record_failure(failures, previous_failures, video_id, error_message, failure_kind)
+                    else:
+                        report.record(video_id, track_num, "downloaded")
+                        failures.pop(video_id, None)
+                        if fast_first:
+                            enrichment_queue[video_id] = None
+            else:
+                # Skip downloading audio if already downloaded
+                print(f"Skipped downloading '{link}' ({track_num}/{song_count})")
 
-        # Explicitly shutdown executors
-        download_executor.shutdown(wait=False)
-        update_executor.shutdown(wait=False)
-
+                if use_threading:
+                    # Defer updating track num when using threading
+                    file_path = os.path.join(playlist_name, song_file_info.file_name)
+                else:
+                    # Update track num and get file path
+                    file_path = apply_file_order(video_id, song_file_info, track_num, config, False)
+
+                # Generate metadata just in case it is missing
+                # Cover art and lyrics of queued songs are left to the enrichment queue
+                skip_enrichment = video_id in enrichment_queue
+                if isinstance(update_executor, concurrent.futures.ProcessPoolExecutor):
+                    task_window.submit(update_executor, functools.partial(on_process_update_result, video_id, track_num, file_path, link), get_process_song_update, video_info, song_file_info, file_path, link, track_num, playlist_title, config, regenerate_metadata, force_update, skip_enrichment)
+                elif use_threading:
+                    task_window.submit(update_executor, functools.partial(on_update_result, video_id, track_num), update_song, video_info, song_file_info, file_path, link, track_num, playlist_title, config, regenerate_metadata, force_update, skip_enrichment)
+                else:
+                    error_message = update_song(video_info, song_file_info, file_path, link, track_num, playlist_title, config, regenerate_metadata, force_update, skip_enrichment)
+                    on_update_result(video_id, track_num, error_message)
+
+        # Update track nums after download and update when using threading
+        if use_threading:
+            # Gather all remaining results
+            task_window.wait()
+
+            # Retry failed downloads that may succeed later before songs are numbered
+            retry_attempt = 0
+            while retry_queue and retry_attempt < download_retries:
+                retry_delay = download_retry_delay * 2 ** retry_attempt
+                print(f"Retrying {len(retry_queue)} failed download(s) in {retry_delay}s...")
+                time.sleep(retry_delay)
+                check_cancelled()
+                retry_downloads = list(retry_queue)
+                retry_queue.clear()
+                for video_id, download_args in retry_downloads:
+                    task_window.submit(download_executor, functools.partial(on_download_result, video_id, download_args), download_song_and_update, *download_args)
+                task_window.wait()
+                retry_attempt += 1
+
+            # Explicitly shutdown executors
+            download_executor.shutdown()
+            update_executor.shutdown()
+    finally:
+        if use_threading:
+            # Workers are stopped and queued tasks discarded if the sync stopped part way
+            download_executor.shutdown(cancel_futures=True)
+            update_executor.shutdown(cancel_futures=True)
+
+    if use_threading:
         # Get all new temporary song file infos for existing and newly downloaded songs and update
-        skipped_track_nums = [track_num for (error_message, track_num) in results if error_message is not None]
-        temp_song_file_infos = get_song_file_infos(playlist_name) # May raise exception for duplicate songs
+        skipped_track_nums = {track_num for track_num, error_message in results.items() if error_message is not None}
+        temp_song_file_infos = get_song_file_infos(playlist_name, get_trust_file_name_ids(base_config)) # May raise exception for duplicate songs
         for i, video_info in enumerate(playlist_entries):
             if video_info is None:
                 # Dummy spacer entry to retain index order
@@ -985,17 +3116,17 @@ def generate_playlist(base_config: dict, config_file_name: str, update: bool, fo
                 skipped_videos += 1
                 continue
 
-            video_id = video_info["id"]
+            video_id = video_info.video_id
             temp_song_file_info = temp_song_file_infos.get(video_id)
             if temp_song_file_info is not None:
                 # Update file path and track num
                 config = get_override_config(video_id, base_config)
-                file_path = update_file_order(playlist_name, temp_song_file_info, track_num, config, False)
+                file_path = apply_file_order(video_id, temp_song_file_info, track_num, config, False)
 
     # Song not found for single song update
     if track_num_to_update is not None:
         print(f"Unable to update metadata for song #{track_num_to_update}: This song could not be found or is unavailable, please update the playlist first")
-        return
+        return report.get_results()
 
     # Move songs that are missing (deleted/privated/etc.) to end of the list
     track_num = len(playlist_entries) - skipped_videos + 1
@@ -1004,10 +3135,239 @@ def generate_playlist(base_config: dict, config_file_name: str, update: bool, fo
             # Update file path and track num
             config = get_override_config(video_id, base_config)
             song_file_info = song_file_infos[video_id]
-            file_path = update_file_order(playlist_name, song_file_info, track_num, config, True)
+            report.record(video_id, song_file_info.track_num, "skipped", "Song is missing from playlist")
+            file_path = apply_file_order(video_id, song_file_info, track_num, config, True)
             track_num += 1
 
+    save_failures(playlist_name, failures, {video_info.video_id for video_info in playlist_entries if video_info is not None})
+
+    # Songs are usable at this point so cover art and lyrics are added last
+    save_enrichment_queue(playlist_name, enrichment_queue)
+    if enrichment_queue:
+        enrich_songs(playlist_name, playlist_title, enrichment_queue, base_config, check_cancelled)
+
+    tag_saves, run_stats = report.stats.get()
+    in_place_tag_saves = tag_saves["in_place"]
+    rewrite_tag_saves = tag_saves["rewrite"]
+    if in_place_tag_saves + rewrite_tag_saves > 0:
+        print(f"Metadata saved in place for {in_place_tag_saves} song(s) and with a full file rewrite for {rewrite_tag_saves} song(s).")
+    cover_bytes = run_stats["cover_bytes"]
+    cover_bytes_saved = run_stats["cover_bytes_saved"]
+    if cover_bytes_saved > 0:
+        print(f"Downloaded {format_bytes(cover_bytes)} of cover thumbnails, about {format_bytes(cover_bytes_saved)} less than with the default thumbnails.")
+    if bandwidth_limiter.is_limited():
+        transfer_bytes = run_stats["transfer_bytes"]
+        throttle_seconds = run_stats["throttle_seconds"]
+        bandwidth_limit = bandwidth_limiter.get_limit()
+        bandwidth_budget = f"{format_bytes(bandwidth_limit)}/s" if bandwidth_limit > 0 else "unlimited"
+        print(f"Transferred {format_bytes(transfer_bytes)} at {format_bytes(transfer_bytes / max(time.perf_counter() - sync_start_time, 0.001))}/s against a current bandwidth budget of {bandwidth_budget}, waiting {format_seconds(throttle_seconds)} for bandwidth.")
+    save_throughput_history(run_stats)
+    save_song_index(playlist_name, playlist_title, base_config)
+
     print("Download finished.")
+    return report.get_results()
+
+class SyncPlan:
+    def __init__(self, playlist_name):
+        self.playlist_name = playlist_name
+        self.folder_rename = None
+        self.downloads = []
+        self.retags = []
+        self.renames = []
+        self.missing = []
+        # The playlist info has already been requested when planning
+        self.requests = {"metadata": 1, "media": 0, "cover": 0, "lyrics": 0}
+        self.estimated_bytes = 0
+        self.estimated_seconds = 0.0
+
+    def add_requests(self, metadata: bool=False, media: bool=False, cover: bool=False, lyrics: bool=False):
+        for kind, needed in (("metadata", metadata), ("media", media), ("cover", cover), ("lyrics", lyrics)):
+            if needed:
+                self.requests[kind] += 1
+
+    def to_dict(self):
+        return {
+            "playlist_name": self.playlist_name,
+            "folder_rename": self.folder_rename,
+            "downloads": self.downloads,
+            "retags": self.retags,
+            "renames": self.renames,
+            "missing": self.missing,
+            "requests": self.requests,
+            "estimated_bytes": self.estimated_bytes,
+            "estimated_seconds": self.estimated_seconds
+        }
+
+    def format(self):
+        lines = [f"Plan for '{self.playlist_name}'"]
+        if self.folder_rename is not None:
+            lines.append(f"- Rename playlist folder to '{self.folder_rename}'")
+        lines.append(f"- Download {len(self.downloads)} song(s)")
+        lines += [f"  - #{download['track_num']} {download['title']} (~{format_bytes(download['bytes'])})" for download in self.downloads]
+        lines.append(f"- Update metadata of {len(self.retags)} song(s)")
+        lines += [f"  - #{retag['track_num']} {retag['name']} ({', '.join(retag['reasons'])})" for retag in self.retags]
+        lines.append(f"- Rename {len(self.renames)} file(s)")
+        lines += [f"  - '{rename['from']}' -> '{rename['to']}'" for rename in self.renames]
+        lines.append(f"- Move {len(self.missing)} song(s) missing from the playlist to the end")
+        lines += [f"  - #{missing['track_num']} {missing['name']}" for missing in self.missing]
+        lines.append("- Expected network requests: " + ", ".join(f"{kind} {count}" for kind, count in self.requests.items()))
+        lines.append(f"- Estimated download size: {format_bytes(self.estimated_bytes)}")
+        lines.append(f"- Estimated time: {format_seconds(self.estimated_seconds)}")
+        return "\n".join(lines)
+
+def format_bytes(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m {seconds:02d}s"
+
+def plan_song_file_order(plan: SyncPlan, song_file_info, track_num, config: dict):
+    # Same file name and track num changes as update_file_order, returns the retag reason if any
+    if config["track_num_in_name"]:
+        file_name = f"{track_num}. " + re.sub(r"^[0-9]+. ", "", song_file_info.file_name)
+        if file_name != song_file_info.file_name:
+            plan.renames.append({"from": song_file_info.file_name, "to": file_name})
+
+    if song_file_info.track_num != track_num and config["include_metadata"]["track"]:
+        return f"track number {song_file_info.track_num} -> {track_num}"
+    return None
+
+def plan_playlist(base_config: dict, update: bool, force_update: bool, regenerate_metadata: bool, single_playlist: bool, current_playlist_name=None):
+    # Works out what generate_playlist would do without downloading, writing tags or renaming anything
+    playlist = get_playlist_info(base_config)
+    if "entries" not in playlist:
+        raise Exception("No videos found in playlist")
+    playlist_entries = [get_playlist_entry(entry) for entry in playlist["entries"]]
+    playlist_title = playlist["title"]
+    del playlist
+
+    playlist_name = "." if single_playlist else format_file_name(playlist_title)
+    folder_name = current_playlist_name if update and current_playlist_name is not None and not single_playlist else playlist_name
+    plan = SyncPlan(folder_name)
+    if folder_name != playlist_name and base_config["sync_folder_name"]:
+        plan.folder_rename = playlist_name
+        if base_config["use_playlist_name"]:
+            regenerate_metadata = True
+
+    song_file_infos = get_song_file_infos(folder_name, get_trust_file_name_ids(base_config)) if os.path.isdir(folder_name) else {}
+    failures = load_failures(folder_name) if os.path.isdir(folder_name) else {}
+    insert_retained_entries(playlist_entries, song_file_infos, base_config)
+
+    # Estimates are based on the throughput of previous runs where available
+    history = load_throughput_history()
+    bytes_per_audio_second = history["bytes"] / history["audio_seconds"] if history["audio_seconds"] > 0 else 20000 # About 160 kbps
+    seconds_per_byte = history["download_seconds"] / history["bytes"] if history["bytes"] > 0 else 1 / (500 * 1024)
+    seconds_per_metadata_update = history["metadata_seconds"] / history["metadata_updates"] if history["metadata_updates"] > 0 else 2.0
+
+    metadata_updates = 0
+    skipped_videos = 0
+    planned_video_ids = set()
+    for i, video_info in enumerate(playlist_entries):
+        if video_info is None:
+            # Dummy spacer entry to retain index order
+            continue
+
+        track_num = i + 1 - skipped_videos
+        video_id = video_info.video_id
+        config = get_override_config(video_id, base_config)
+        include_metadata = config["include_metadata"]
+        song_file_info = song_file_infos.get(video_id)
+        planned_video_ids.add(video_id)
+
+        if song_file_info is None and get_skipped_failure(failures, video_id) is not None:
+            # Known unavailable songs are not tried again yet and later songs move up like in a sync
+            skipped_videos += 1
+            continue
+
+        if song_file_info is None:
+            # Entries without a duration are assumed to be about 4 minutes long
+            size = int((video_info.duration or 240) * bytes_per_audio_second)
+            plan.downloads.append({"track_num": track_num, "video_id": video_id, "title": video_info.title, "bytes": size})
+            plan.add_requests(metadata=True, media=True, cover=include_metadata["cover"], lyrics=include_metadata["lyrics"])
+            plan.estimated_bytes += size
+            plan.estimated_seconds += size * seconds_per_byte
+            continue
+
+        reasons = []
+        track_num_reason = plan_song_file_order(plan, song_file_info, track_num, config)
+        if track_num_reason is not None:
+            reasons.append(track_num_reason)
+
+        if force_update:
+            reasons.append("force update")
+            plan.add_requests(metadata=True, cover=include_metadata["cover"], lyrics=include_metadata["lyrics"])
+            metadata_updates += 1
+        else:
+            try:
+                metadata_dict = get_metadata_dict(id3.ID3(song_file_info.file_path), config)
+            except Exception:
+                metadata_dict = None
+            if metadata_dict is not None and (regenerate_metadata or not valid_metadata(config, metadata_dict)):
+                reasons.append("regenerate metadata" if regenerate_metadata else "missing metadata")
+                missing_cover = include_metadata["cover"] and not metadata_dict["APIC:Front cover"]
+                missing_lyrics = include_metadata["lyrics"] and (not metadata_dict["SYLT"] or not metadata_dict["USLT"])
+                plan.add_requests(metadata=True, cover=missing_cover, lyrics=missing_lyrics)
+                metadata_updates += 1
+
+        if reasons:
+            plan.retags.append({"track_num": track_num, "video_id": video_id, "name": song_file_info.name, "reasons": reasons})
+
+    # Songs that are missing from the playlist are moved to the end
+    track_num = len(playlist_entries) - skipped_videos + 1
+    for video_id, song_file_info in song_file_infos.items():
+        if video_id not in planned_video_ids:
+            config = get_override_config(video_id, base_config)
+            plan.missing.append({"track_num": track_num, "video_id": video_id, "name": song_file_info.name})
+            track_num_reason = plan_song_file_order(plan, song_file_info, track_num, config)
+            if track_num_reason is not None:
+                plan.retags.append({"track_num": track_num, "video_id": video_id, "name": song_file_info.name, "reasons": [track_num_reason]})
+            track_num += 1
+
+    plan.estimated_seconds += metadata_updates * seconds_per_metadata_update
+    if base_config["use_threading"]:
+        thread_count = base_config["thread_count"]
+        if thread_count <= 0:
+            thread_count = min(32, (os.cpu_count() or 1) + 4)
+        plan.estimated_seconds /= thread_count
+    return plan
+
+# Syncs started once this many are running wait for one to finish, an executor can be passed to sync_playlist to run more at once
+max_concurrent_syncs = 4
+sync_executor = None
+sync_executor_lock = threading.Lock()
+
+def get_sync_executor():
+    # Each running playlist sync occupies one thread which waits on its own download and update executors
+    global sync_executor
+    with sync_executor_lock:
+        if sync_executor is None:
+            sync_executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrent_syncs, thread_name_prefix="playlist_sync")
+        return sync_executor
+
+async def sync_playlist(config: dict, config_file_name: str=".playlist_config.json", update: bool=True, force_update: bool=False, regenerate_metadata: bool=False, single_playlist: bool=False, current_playlist_name=None, track_num_to_update=None, event_queue=None, executor=None):
+    # Asyncio wrapper for generate_playlist which returns a list of SongResult
+    # Each SongResult is put into event_queue as it is recorded if an asyncio.Queue is given
+    loop = asyncio.get_running_loop()
+    cancel_event = threading.Event()
+
+    progress_callback = None
+    if event_queue is not None:
+        progress_callback = lambda song_result: loop.call_soon_threadsafe(event_queue.put_nowait, song_result)
+
+    task = (executor or get_sync_executor()).submit(generate_playlist, setup_config(config), config_file_name, update, force_update, regenerate_metadata, single_playlist, current_playlist_name, track_num_to_update, progress_callback, cancel_event)
+    try:
+        return await asyncio.wrap_future(task)
+    except asyncio.CancelledError:
+        # Syncs still waiting for a free thread are dropped before they touch the playlist folder
+        if task.cancel():
+            raise
+
+        # Wait for the sync to stop at the next song so the playlist folder is left in a consistent state
+        cancel_event.set()
+        await loop.run_in_executor(None, concurrent.futures.wait, [task])
+        raise
 
 def get_existing_playlists(directory: str, config_file_name: str):
     playlists_data = []
@@ -1069,6 +3429,197 @@ def get_existing_playlists(directory: str, config_file_name: str):
 
     return playlists_data
 
+class SyncDaemon:
+    def __init__(self, config_file_name: str, single_playlist: bool, default_interval: int):
+        self.config_file_name = config_file_name
+        self.single_playlist = single_playlist
+        self.default_interval = default_interval
+        self.jobs = queue.Queue()
+        self.queued_jobs = set()
+        self.snapshots = {}
+        self.lock = threading.Lock()
+
+    def get_playlists_data(self):
+        if self.single_playlist:
+            return [{"playlist_name": os.path.basename(os.getcwd()), "config_file": self.config_file_name}]
+        return get_existing_playlists(".", self.config_file_name)
+
+    def refresh_playlists(self):
+        # Playlist folders may be renamed when syncing so playlists are tracked by playlist id
+        for playlist_data in self.get_playlists_data():
+            try:
+                with open(playlist_data["config_file"], "r") as f:
+                    config = setup_config(json.load(f))
+                playlist_id = get_url_parameter(config["url"], "list")
+            except Exception as e:
+                print(f"[ERROR] Unable to load config file '{playlist_data['config_file']}': {e}")
+                continue
+
+            interval = config["sync_interval"] if config["sync_interval"] > 0 else self.default_interval
+            with self.lock:
+                snapshot = self.snapshots.setdefault(playlist_id, {
+                    "last_sync": None,
+                    "last_duration": None,
+                    "last_error": None,
+                    "last_results": {},
+                    "next_sync": time.time() if interval > 0 else None,
+                    "queued": False
+                })
+                snapshot["playlist_name"] = playlist_data["playlist_name"]
+                snapshot["config_file"] = playlist_data["config_file"]
+                snapshot["interval"] = interval
+
+    def find_playlist_id(self, playlist):
+        with self.lock:
+            if playlist in self.snapshots:
+                return playlist
+            for playlist_id, snapshot in self.snapshots.items():
+                if snapshot["playlist_name"] == playlist:
+                    return playlist_id
+        return None
+
+    def enqueue(self, playlist_id, track_num=None):
+        job = (playlist_id, track_num)
+        with self.lock:
+            if job in self.queued_jobs:
+                return False
+            self.queued_jobs.add(job)
+            if track_num is None:
+                self.snapshots[playlist_id]["queued"] = True
+        self.jobs.put(job)
+        return True
+
+    def run_job(self, playlist_id, track_num):
+        with self.lock:
+            snapshot = dict(self.snapshots[playlist_id])
+
+        start_time = time.time()
+        error = None
+        status_counts = {}
+        try:
+            with open(snapshot["config_file"], "r") as f:
+                config = setup_config(json.load(f))
+            playlist_name = "." if self.single_playlist else snapshot["playlist_name"]
+            song_results = generate_playlist(config, self.config_file_name, True, False, False, self.single_playlist, playlist_name, track_num)
+            for song_result in song_results:
+                status_counts[song_result.status] = status_counts.get(song_result.status, 0) + 1
+        except Exception as e:
+            error = str(e)
+            print(e)
+            print(f"Error encountered while syncing '{snapshot['playlist_name']}'.")
+
+        if track_num is None:
+            with self.lock:
+                snapshot = self.snapshots[playlist_id]
+                snapshot["last_sync"] = start_time
+                snapshot["last_duration"] = time.time() - start_time
+                snapshot["last_error"] = error
+                snapshot["last_results"] = status_counts
+                snapshot["queued"] = False
+                snapshot["next_sync"] = time.time() + snapshot["interval"] * 60 if snapshot["interval"] > 0 else None
+
+    def run_jobs(self):
+        # Jobs are run one at a time as playlists are synced relative to the working directory
+        while True:
+            job = self.jobs.get()
+            try:
+                self.run_job(*job)
+            finally:
+                with self.lock:
+                    self.queued_jobs.discard(job)
+
+    def run_schedule(self, refresh_seconds: int=30):
+        last_refresh = 0
+        while True:
+            if time.time() - last_refresh >= refresh_seconds:
+                try:
+                    self.refresh_playlists()
+                except Exception as e:
+                    print(e)
+                    print("Failed to get a list of existing playlists")
+                last_refresh = time.time()
+
+            with self.lock:
+                due_playlist_ids = [playlist_id for playlist_id, snapshot in self.snapshots.items() if not snapshot["queued"] and snapshot["next_sync"] is not None and snapshot["next_sync"] <= time.time()]
+            for playlist_id in due_playlist_ids:
+                self.enqueue(playlist_id)
+            time.sleep(1)
+
+    def get_status(self):
+        with self.lock:
+            return {
+                "playlists": copy.deepcopy(self.snapshots),
+                "queued_jobs": len(self.queued_jobs)
+            }
+
+def create_daemon_request_handler(daemon: SyncDaemon):
+    class DaemonRequestHandler(http_server.BaseHTTPRequestHandler):
+        def send_json(self, status: int, data: dict):
+            body = json.dumps(data, indent=4).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if urlparse(self.path).path == "/status":
+                self.send_json(200, daemon.get_status())
+            else:
+                self.send_json(404, {"error": "Unknown request"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            if url.path not in ["/sync", "/retag"]:
+                self.send_json(404, {"error": "Unknown request"})
+                return
+
+            if "playlist" in params:
+                playlist_ids = [daemon.find_playlist_id(params["playlist"])]
+                if playlist_ids[0] is None:
+                    self.send_json(404, {"error": f"Playlist '{params['playlist']}' not found"})
+                    return
+            elif url.path == "/sync":
+                with daemon.lock:
+                    playlist_ids = list(daemon.snapshots.keys())
+            else:
+                self.send_json(400, {"error": "A playlist is required to retag a song"})
+                return
+
+            track_num = None
+            if url.path == "/retag":
+                try:
+                    track_num = int(params["track"])
+                    if track_num <= 0:
+                        raise ValueError()
+                except (KeyError, ValueError):
+                    self.send_json(400, {"error": "A valid track number greater than 0 is required"})
+                    return
+
+            queued = [playlist_id for playlist_id in playlist_ids if daemon.enqueue(playlist_id, track_num)]
+            self.send_json(202, {"queued": queued})
+
+        def log_message(self, format, *args):
+            # Avoid cluttering sync output with request logs
+            pass
+
+    return DaemonRequestHandler
+
+def run_daemon(config_file_name: str, single_playlist: bool, host: str, port: int, default_interval: int):
+    daemon = SyncDaemon(config_file_name, single_playlist, default_interval)
+    daemon.refresh_playlists()
+
+    server = http_server.ThreadingHTTPServer((host, port), create_daemon_request_handler(daemon))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    threading.Thread(target=daemon.run_jobs, daemon=True).start()
+
+    print(f"Running sync daemon on http://{host}:{port} for {len(daemon.snapshots)} playlist(s). Press Ctrl+C to stop.")
+    try:
+        daemon.run_schedule()
+    finally:
+        server.shutdown()
+
 def get_bool_option_response(prompt, default: bool):
     if default:
         prompt_choice = "Y/n"
@@ -1118,6 +3669,36 @@ def get_numeric_option_response(prompt):
     return index
 
 if __name__ == "__main__":
+    # Needed for update processes in the standalone executable
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="Download and update local copies of YouTube playlists")
+    parser.add_argument("--daemon", action="store_true", help="Run as a daemon that periodically syncs all playlists in the current directory")
+    parser.add_argument("--host", default="127.0.0.1", help="Address for the daemon to accept requests on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the daemon to accept requests on (default: 8765)")
+    parser.add_argument("--interval", type=int, default=60, help="Default minutes between daemon syncs of a playlist, 0 to only sync on request (default: 60)")
+    parser.add_argument("--plan", nargs="?", const="", metavar="URL", help="Show the downloads, metadata updates, renames and estimated cost of updating all playlists in the current directory, or of downloading the playlist at URL, without changing anything")
+    parser.add_argument("--force", action="store_true", help="Plan a forced update of all names and metadata (with --plan)")
+    parser.add_argument("--verify", action="store_true", help="Check the songs of all playlists in the current directory for broken audio and move broken songs out so they are downloaded again on the next update")
+    parser.add_argument("--worker", metavar="PLAYLIST_FOLDER", help="Run as a worker that downloads and updates songs from the work queue of a playlist folder being synced with work_queue enabled")
+    parser.add_argument("--record", metavar="DIR", help="Record playlist info, song info, covers, lyrics and downloaded audio into DIR while running")
+    parser.add_argument("--replay", metavar="DIR", help="Replay the network traffic recorded with --record from DIR instead of using the network")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each replayed request (with --replay)")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="Bandwidth limit for replayed responses in KB/s, 0 for unlimited (with --replay)")
+    args = parser.parse_args()
+
+    if args.record is not None:
+        cassette = Cassette(args.record, "record")
+    elif args.replay is not None:
+        cassette = Cassette(args.replay, "replay", args.latency, args.bandwidth * 1024)
+
+    if args.worker is not None:
+        try:
+            run_worker(args.worker)
+        except KeyboardInterrupt:
+            print("\nQuitting...")
+        sys.exit()
+
     print("\n".join([
         "YouTube Music Playlist Downloader v" + version,
         "-----------------------------------------------------------",
@@ -1151,6 +3732,46 @@ if __name__ == "__main__":
     if single_playlist:
         print(f"Current folder detected as a playlist. Running in single playlist mode.\nIf you did not expect this, please remove '{config_file_name}' from this folder.")
 
+    if args.daemon:
+        try:
+            check_ffmpeg()
+            run_daemon(config_file_name, single_playlist, args.host, args.port, args.interval)
+        except KeyboardInterrupt:
+            print("\nQuitting...")
+        sys.exit()
+
+    if args.verify:
+        try:
+            if single_playlist:
+                playlist_names = ["."]
+            else:
+                playlist_names = [playlist_data["playlist_name"] for playlist_data in get_existing_playlists(".", config_file_name)]
+            # Verification is CPU bound so files are checked in separate processes
+            with concurrent.futures.ProcessPoolExecutor() as verify_executor:
+                broken_count = sum(len(verify_playlist(playlist_name, verify_executor)) for playlist_name in playlist_names)
+            if broken_count > 0:
+                print(f"Update the playlists to download the {broken_count} broken song(s) again.")
+        except KeyboardInterrupt:
+            print("\nQuitting...")
+        sys.exit()
+
+    if args.plan is not None:
+        try:
+            if args.plan:
+                print(plan_playlist(setup_config({"url": args.plan}), False, False, False, False).format())
+            elif single_playlist:
+                with open(config_file_name, "r") as f:
+                    config = setup_config(json.load(f))
+                print(plan_playlist(config, True, args.force, False, True).format())
+            else:
+                for playlist_data in get_existing_playlists(".", config_file_name):
+                    with open(playlist_data["config_file"], "r") as f:
+                        config = setup_config(json.load(f))
+                    print(plan_playlist(config, True, args.force, False, False, playlist_data["playlist_name"]).format() + "\n")
+        except KeyboardInterrupt:
+            print("\nQuitting...")
+        sys.exit()
+
     while True:
         try:
             check_ffmpeg()